@@ -0,0 +1,146 @@
+"""
+Extractive sentence selection for long documents.
+Sentences become hashed TF-IDF vectors. TextRank (PageRank over the
+cosine similarity graph), blended with similarity to the document
+centroid, ranks them and the best sentences are kept in document order
+up to a token budget. Pure NumPy, so it also works when no
+summarization model is available.
+"""
+
+import math
+import os
+import re
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.paraphrasing.sentences import split_paragraphs
+
+# Tokens of extracted text handed to the abstractive model
+EXTRACT_TOKEN_BUDGET = int(os.getenv("SUMMARY_EXTRACT_TOKEN_BUDGET", "900"))
+# Above this many sentences the n x n graph is skipped and only the centroid score is used
+MAX_GRAPH_SENTENCES = int(os.getenv("SUMMARY_EXTRACT_MAX_GRAPH_SENTENCES", "3000"))
+# Share of the centroid score in the blended ranking
+CENTROID_WEIGHT = float(os.getenv("SUMMARY_EXTRACT_CENTROID_WEIGHT", "0.3"))
+
+HASH_DIM = 1 << 12
+DAMPING = 0.85
+
+_WORD = re.compile(r"\w+")
+
+
+def estimate_tokens(sentences: List[str]) -> List[int]:
+    """Rough subword count when no tokenizer is at hand"""
+    return [math.ceil(len(s.split()) * 1.3) for s in sentences]
+
+
+def sentence_vectors(sentences: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Unit-length hashed TF-IDF vectors as compressed sparse rows:
+    (offsets, features, weights), row i spanning offsets[i]:offsets[i + 1].
+    Memory grows with the words in the text, not sentences x HASH_DIM.
+    """
+    rows = []
+    for sentence in sentences:
+        hashed = [zlib.crc32(w.encode("utf-8")) % HASH_DIM for w in _WORD.findall(sentence.lower())]
+        rows.append(np.unique(np.array(hashed, dtype=np.int64), return_counts=True))
+    offsets = np.zeros(len(sentences) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(features) for features, _ in rows])
+    features = np.concatenate([f for f, _ in rows]) if rows else np.zeros(0, dtype=np.int64)
+    counts = np.concatenate([c for _, c in rows]).astype(np.float32) if rows else np.zeros(0, dtype=np.float32)
+
+    df = np.bincount(features, minlength=HASH_DIM)
+    idf = (np.log((1.0 + len(sentences)) / (1.0 + df)) + 1.0).astype(np.float32)
+    weights = counts * idf[features]
+    owner = np.repeat(np.arange(len(sentences)), np.diff(offsets))
+    norms = np.sqrt(np.bincount(owner, weights=weights * weights, minlength=len(sentences)))
+    weights /= np.maximum(norms[owner], 1e-9).astype(np.float32)
+    return offsets, features, weights
+
+
+def similarity_matrix(offsets: np.ndarray, features: np.ndarray, weights: np.ndarray,
+                      block_elements: int = 1 << 22) -> np.ndarray:
+    """Cosine similarity of every pair of sparse rows, a block of rows at a time"""
+    n = len(offsets) - 1
+    similarity = np.zeros((n, n), dtype=np.float32)
+    if not len(features):
+        return similarity
+    # Rows with no features sum nothing; reduceat would hand back a neighbour's first element,
+    # and trailing empty rows start past the end, so they are left out of it altogether
+    empty = offsets[:-1] == offsets[1:]
+    filled = int(np.searchsorted(offsets[:-1], len(features)))
+    block = max(1, block_elements // len(features))
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        lo, hi = offsets[start], offsets[stop]
+        dense = np.zeros((stop - start, HASH_DIM), dtype=np.float32)
+        dense[np.repeat(np.arange(stop - start), np.diff(offsets[start:stop + 1])), features[lo:hi]] = weights[lo:hi]
+        products = dense[:, features] * weights
+        similarity[start:stop, :filled] = np.add.reduceat(products, offsets[:filled], axis=1)
+        similarity[start:stop, empty] = 0.0
+    return similarity
+
+
+def textrank(similarity: np.ndarray, damping: float = DAMPING, iterations: int = 50,
+             tol: float = 1e-6) -> np.ndarray:
+    """PageRank scores over a weighted sentence similarity graph"""
+    n = similarity.shape[0]
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0.0)
+    out = weights.sum(axis=1, keepdims=True)
+    # A sentence similar to nothing links to every sentence evenly
+    transition = np.where(out > 0, weights / np.maximum(out, 1e-12), 1.0 / n)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1.0 - damping) / n + damping * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def rank_sentences(offsets: np.ndarray, features: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Blend of TextRank centrality and similarity to the document centroid"""
+    n = len(offsets) - 1
+    owner = np.repeat(np.arange(n), np.diff(offsets))
+    centroid = np.bincount(features, weights=weights, minlength=HASH_DIM) / max(1, n)
+    centroid /= max(float(np.linalg.norm(centroid)), 1e-9)
+    central = np.bincount(owner, weights=weights * centroid[features], minlength=n)
+    if n > MAX_GRAPH_SENTENCES:
+        return central
+    rank = textrank(similarity_matrix(offsets, features, weights))
+    rank = rank / max(float(rank.max()), 1e-12)
+    return (1.0 - CENTROID_WEIGHT) * rank + CENTROID_WEIGHT * central
+
+
+def extract_sentences(text: str, token_budget: Optional[int] = None, max_sentences: Optional[int] = None,
+                      count_tokens: Optional[Callable[[List[str]], List[int]]] = None) -> List[str]:
+    """Top-ranked sentences, in document order, that fit token_budget"""
+    sentences = [s for paragraph in split_paragraphs(text) for s in paragraph]
+    if not sentences:
+        return []
+    budget = token_budget or EXTRACT_TOKEN_BUDGET
+    lengths = (count_tokens or estimate_tokens)(sentences)
+    scores = rank_sentences(*sentence_vectors(sentences))
+
+    order = np.argsort(-scores, kind="stable")
+    chosen, used = [], 0
+    for i in order:
+        if max_sentences and len(chosen) >= max_sentences:
+            break
+        if used + lengths[i] > budget:
+            continue
+        chosen.append(i)
+        used += lengths[i]
+    if not chosen:
+        # Every sentence is over budget on its own; keep the best one
+        chosen = [order[0]]
+    return [sentences[i] for i in sorted(chosen)]
+
+
+def extract(text: str, token_budget: Optional[int] = None, max_sentences: Optional[int] = None,
+            count_tokens: Optional[Callable[[List[str]], List[int]]] = None) -> str:
+    """extract_sentences joined back into text"""
+    return " ".join(extract_sentences(text, token_budget, max_sentences, count_tokens))
@@ -1,3 +1,4 @@
+import os
 from fastapi import FastAPI, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
 from typing import List
@@ -6,6 +7,11 @@ from backend.api.passhash import hash_password, verify_password
 from backend.api.auth import create_access_token, verify_token
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from backend.api.routers.profile_routes import router as profile_router
+from backend.paraphrasing.router import router as paraphrasing_router
+from backend.api.routers.summarization_routes import router as summarization_router
+from backend.paraphrasing.scheduler import get_scheduler
+from backend.paraphrasing.workers import WORKER_PROCESSES
+from backend.api import summarization
 
 app = FastAPI(title="Text Morph AI - Railway")
 security = HTTPBearer()
@@ -28,6 +34,12 @@ async def startup_event():
     create_users_table()
     create_profiles_table()
     create_processing_history_table()
+    # Load Pegasus in the background; requests before it is ready wait for it
+    if os.getenv("SUMMARIZER_WARMUP", "1") == "1":
+        summarization.warmup()
+    # Start the inference worker pool now; its workers load T5 in the background
+    if WORKER_PROCESSES > 0:
+        get_scheduler()
 
 # Simple auth endpoints
 @app.post("/auth/login")
@@ -97,7 +109,7 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "service": "text-morph-ai"}
+    return {"status": "ok", "service": "text-morph-ai", "summarizer": summarization.readiness()}
 
 # Simple text processing endpoint
 @app.post("/process")
@@ -203,6 +215,9 @@ def get_user_history(user_id: int, current_user: dict = Depends(get_current_user
 
 # Include profile router
 app.include_router(profile_router, prefix="/profile", tags=["profile"])
+# Model services the frontend calls; they share this process's inference executors
+app.include_router(paraphrasing_router, prefix="/paraphrasing", tags=["paraphrasing"])
+app.include_router(summarization_router, prefix="/summarize", tags=["summarization"])
 
 # Verification endpoint (optional)
 @app.get("/verify")
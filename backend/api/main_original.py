@@ -1,3 +1,4 @@
+import os
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
@@ -6,6 +7,10 @@ from backend.api.routers.auth_routes import router as auth_router
 from backend.api.routers.profile_routes import router as profile_router
 from backend.paraphrasing.router import router as paraphrasing_router
 from backend.api.history import router as history_router
+from backend.api.routers.summarization_routes import router as summarization_router
+from backend.paraphrasing.scheduler import get_scheduler
+from backend.paraphrasing.workers import WORKER_PROCESSES
+from backend.api import summarization
 from backend.api.database import create_admin_table, create_users_table, create_profiles_table, create_user_texts_table, create_processing_history_table, create_admin_activity_table, create_user_feedback_table
 
 app = FastAPI()
@@ -21,18 +26,30 @@ async def startup_event():
     create_admin_table()
     create_admin_activity_table()
     create_user_feedback_table()
+    # Load Pegasus in the background; requests before it is ready wait for it
+    if os.getenv("SUMMARIZER_WARMUP", "1") == "1":
+        summarization.warmup()
+    # Start the inference worker pool now; its workers load T5 in the background
+    if WORKER_PROCESSES > 0:
+        get_scheduler()
 
 # Include routers
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(profile_router, prefix="/profile", tags=["profile"])
 app.include_router(paraphrasing_router, prefix="/paraphrasing", tags=["paraphrasing"])
 app.include_router(history_router, tags=["history"])
+app.include_router(summarization_router, prefix="/summarize", tags=["summarization"])
 
 # Root endpoint
 @app.get("/")
 def read_root():
     return {"message": "Backend is running!"}
 
+@app.get("/health")
+def health_check():
+    """Liveness plus model readiness; the API is usable while the summarizer warms up"""
+    return {"status": "ok", "service": "text-morph-api", "summarizer": summarization.readiness()}
+
 security = HTTPBearer()
 
 @app.get("/verify")
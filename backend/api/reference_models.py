@@ -9,6 +9,8 @@ from transformers import T5ForConditionalGeneration, T5Tokenizer, AutoTokenizer
 import logging
 import os
 
+from backend.paraphrasing.mmap_weights import load_mmap_model, mmap_enabled
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -48,8 +50,11 @@ class ReferenceModelsService:
                     except:
                         self.tokenizers[model_name] = AutoTokenizer.from_pretrained(model_path)
                     
-                    # Load model
-                    self.models[model_name] = T5ForConditionalGeneration.from_pretrained(model_path)
+                    # Load model (memory-mapped so worker processes share the weights)
+                    if mmap_enabled():
+                        self.models[model_name] = load_mmap_model(T5ForConditionalGeneration, model_path)
+                    else:
+                        self.models[model_name] = T5ForConditionalGeneration.from_pretrained(model_path)
                     self.models[model_name].to(self.device)
                     self.models[model_name].eval()
                     
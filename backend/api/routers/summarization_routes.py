@@ -0,0 +1,191 @@
+# backend/api/routers/summarization_routes.py
+import os
+import threading
+import time
+from functools import partial
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from backend.paraphrasing.cancellation import REQUEST_TIMEOUT_SECONDS, CancelToken, RequestCancelled
+from backend.paraphrasing.router import await_inference
+from backend.paraphrasing.scheduler import MicroBatchScheduler, QueueFullError
+from backend.paraphrasing.streaming import StreamLimiter, sse_stream
+from backend.api.summarization import (CHUNK_BATCH_SIZE, SUMMARY_PRESETS, cache_stats, generate_summary_stream,
+                                       model_name, readiness, summarize_batch, summarize_long_text)
+from backend.api.summary_routing import LATENCY_TARGET_MS, get_summary_router
+
+
+router = APIRouter()
+
+# Requests at one length wait this long for others to share their generate() call
+SUMMARY_MAX_WAIT_MS = float(os.getenv("SUMMARY_MAX_WAIT_MS", "20"))
+SUMMARY_MAX_QUEUE = int(os.getenv("SUMMARY_MAX_QUEUE", "32"))
+
+SUMMARY_MODES = ("auto", "long", "fast")
+
+# /stream decodes outside the scheduler, so it has its own concurrency cap
+stream_limiter = StreamLimiter()
+
+class SummaryRequest(BaseModel):
+    text: str = Field(..., min_length=3)
+    lengths: List[str] = Field(["medium"], min_length=1, description="Any of short | medium | long")
+    mode: str = Field("auto", description="auto | long (map-reduce with per-length settings) | fast (extractive pre-filter)")
+    latency_target_ms: Optional[float] = Field(None, ge=0, description="Route to a faster model tier to meet this; 0 always uses the best")
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Deadline; queued work is dropped once it passes")
+
+class SummaryResponse(BaseModel):
+    summaries: Dict[str, str]
+    tier: str
+    model: str
+    mode: str
+    latency_ms: float
+    reports: Optional[Dict[str, Optional[dict]]] = Field(None, description="long mode: map-reduce depth and per-level timings")
+
+class SummaryStreamRequest(BaseModel):
+    text: str = Field(..., min_length=3)
+    length: str = Field("medium", description="short | medium | long")
+    chunk_token_limit: int = Field(512, description="Inputs longer than this are chunk-summarized first")
+
+def run_summary_batch(texts, level="medium", cancel_tokens=None, **_):
+    """
+    Scheduler runner. level is the comma-joined lengths, so requests for
+    the same lengths share a batch: one padded encoder pass, then one
+    decode per length.
+    """
+    lengths = level.split(",")
+    return [([summaries], {"lengths": lengths}) for summaries in summarize_batch(texts, lengths, cancel_tokens)]
+
+def summarize_long(text, lengths, cancel=None):
+    """Map-reduce summaries per length, with each length's tree report (None when cached)"""
+    results = {length: summarize_long_text(text, summary_params=SUMMARY_PRESETS[length], with_report=True,
+                                           cancel=cancel)
+               for length in lengths}
+    return {"summaries": {length: summary for length, (summary, _) in results.items()},
+            "reports": {length: report for length, (_, report) in results.items()},
+            "tier": "pegasus-large", "model": model_name}
+
+# Global instance
+summary_scheduler: Optional[MicroBatchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_summary_scheduler() -> MicroBatchScheduler:
+    """Get or create the scheduler that batches summary requests across users"""
+    global summary_scheduler
+    with _scheduler_lock:
+        if summary_scheduler is None:
+            summary_scheduler = MicroBatchScheduler(runner=run_summary_batch, max_batch_size=CHUNK_BATCH_SIZE,
+                                                    max_wait_ms=SUMMARY_MAX_WAIT_MS, max_queue=SUMMARY_MAX_QUEUE)
+            # Routed summaries run one at a time on this executor, so its queue is their load
+            get_summary_router().queued = summary_scheduler.queue_depth
+        return summary_scheduler
+
+@router.post("/generate", response_model=SummaryResponse)
+async def summarize_endpoint(req: SummaryRequest, request: Request):
+    """
+    Summaries at each requested length. In auto mode on the default tier
+    the request joins a padded batch with other users' requests for the
+    same lengths, unless the load means Pegasus would miss the latency
+    target and a faster tier is routed to; long and fast modes run as a
+    single task.
+    """
+    if not req.text.strip():
+        raise HTTPException(status_code=400, detail="Empty text.")
+    unknown = [length for length in req.lengths if length not in SUMMARY_PRESETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown length: {', '.join(unknown)}")
+    if req.mode not in SUMMARY_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {req.mode}")
+
+    lengths = list(dict.fromkeys(req.lengths))
+    latency_target = LATENCY_TARGET_MS if req.latency_target_ms is None else req.latency_target_ms
+    batched = req.mode == "auto"
+    if batched and latency_target:
+        # Batch on Pegasus while it meets the target; once the queue makes it too slow, route to a faster tier
+        router = get_summary_router()
+        tier, routed_fast, _ = router.choose(req.text, latency_target)
+        batched = tier.model_id == model_name and not routed_fast
+    scheduler = get_summary_scheduler()
+    token = CancelToken(req.timeout_seconds or REQUEST_TIMEOUT_SECONDS)
+    started = time.perf_counter()
+    try:
+        if batched:
+            # Canonical order, so the same set of lengths always lands in the same batch
+            level = ",".join(length for length in SUMMARY_PRESETS if length in lengths)
+            future = scheduler.submit(req.text, level=level, max_new_tokens=0, model_name=model_name, cancel=token)
+        elif req.mode == "long":
+            # The scheduler keeps its own reference to the token, the task gets one to stop decoding
+            future = scheduler.submit_task(partial(summarize_long, cancel=token), req.text, lengths, cancel=token)
+        else:
+            future = scheduler.submit_task(partial(get_summary_router().summarize, cancel=token), req.text, lengths,
+                                           latency_target_ms=latency_target, fast=req.mode == "fast", cancel=token)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Summarization is at capacity, please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    try:
+        result = await await_inference(request, future, token)
+    except RequestCancelled as e:
+        if e.reason == "deadline":
+            raise HTTPException(status_code=504, detail="Summarization did not finish before the deadline.")
+        raise HTTPException(status_code=499, detail="Client closed the request.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if batched:
+        outputs, _ = result
+        result = {"summaries": outputs[0], "tier": "pegasus-large", "model": model_name}
+    return SummaryResponse(
+        summaries=result["summaries"],
+        tier=result["tier"],
+        model=result["model"],
+        mode=req.mode,
+        latency_ms=(time.perf_counter() - started) * 1000.0,
+        reports=result.get("reports")
+    )
+
+@router.post("/stream")
+def summary_stream_endpoint(req: SummaryStreamRequest):
+    """Server-sent events: summary text as Pegasus decodes it, then a final "done" event"""
+    if not req.text.strip():
+        raise HTTPException(status_code=400, detail="Empty text.")
+    if req.length not in SUMMARY_PRESETS:
+        raise HTTPException(status_code=400, detail=f"Unknown length: {req.length}")
+
+    if not stream_limiter.try_acquire():
+        raise HTTPException(
+            status_code=429,
+            detail="Summarization is at capacity, please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
+
+    preset = SUMMARY_PRESETS[req.length]
+    # Closing the response closes this generator, which cancels decoding
+    events = generate_summary_stream(
+        req.text,
+        max_length=preset["max_length"],
+        min_length=preset["min_length"],
+        chunk_token_limit=req.chunk_token_limit,
+        chunk_params=preset,
+        cancel=CancelToken(REQUEST_TIMEOUT_SECONDS),
+    )
+    return StreamingResponse(
+        sse_stream(stream_limiter.hold(events)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/status")
+def summarizer_status_endpoint():
+    """Whether Pegasus is loaded, still loading, or failed to load, plus routing tiers, cache hit rates and queue"""
+    scheduler = get_summary_scheduler()
+    return dict(
+        readiness(),
+        routing=get_summary_router().snapshot(),
+        cache=cache_stats(),
+        queue={"depth": scheduler.queue_depth(), "max_queue": scheduler.max_queue,
+               "service_rate": scheduler.service_rate},
+    )
@@ -1,6 +1,19 @@
+import hashlib
+import io
 import os
-from transformers import PegasusForConditionalGeneration, PegasusTokenizer
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import torch
+from transformers import LogitsProcessorList, PegasusForConditionalGeneration, PegasusTokenizer, StoppingCriteriaList
+from transformers.modeling_outputs import BaseModelOutput
+from backend.paraphrasing import metrics
+from backend.paraphrasing.cache import CACHE_ROOT, ResultCache, make_key
+from backend.paraphrasing.cancellation import (AllCancelledCriteria, CancelledRowsProcessor, CancelToken,
+                                               RequestCancelled, is_cancelled)
+from backend.paraphrasing.streaming import iter_generated_text
+from backend.paraphrasing.sentences import split_paragraphs
+from backend.paraphrasing.mmap_weights import load_mmap_model, mmap_enabled
+from backend.api.extractive import extract
 #from rouge_score import rouge_scorer
 
 
@@ -10,13 +23,98 @@ SAVE_PATH = "summarization_samples"
 os.makedirs(SAVE_PATH, exist_ok=True)
 
 
-# Load tokenizer and model (Pegasus Large)
+# Chunks summarized per padded generate() call
+CHUNK_BATCH_SIZE = int(os.getenv("SUMMARY_CHUNK_BATCH_SIZE", "8"))
+# Tokens of trailing sentences repeated at the start of the next chunk
+CHUNK_OVERLAP_TOKENS = int(os.getenv("SUMMARY_CHUNK_OVERLAP_TOKENS", "64"))
+# Input window of the summarizer; chunk summaries are reduced until they fit
+MODEL_MAX_TOKENS = int(os.getenv("SUMMARY_MODEL_MAX_TOKENS", "1024"))
+# Stop reducing after this many levels and truncate whatever is left
+MAX_REDUCE_DEPTH = int(os.getenv("SUMMARY_MAX_REDUCE_DEPTH", "6"))
+# Characters of a streamed file or iterator chunked at a time
+STREAM_BLOCK_CHARS = int(os.getenv("SUMMARY_STREAM_BLOCK_CHARS", "20000"))
+# Summary cache: in-process LRU plus an SQLite file under SUMMARY_CACHE_DIR (empty = memory only)
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "1") == "1"
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+SUMMARY_CACHE_DIR = os.getenv("SUMMARY_CACHE_DIR", os.path.join(CACHE_ROOT, "summary-cache"))
+
+# Labelled by the function that was asked: generate_summary, summarize_long_text, summarize_lengths
+cache_hits = metrics.counter("summary_cache_hits")
+cache_misses = metrics.counter("summary_cache_misses")
+
+
+# Tokenizer and model (Pegasus Large) are loaded on first use or by warmup()
 model_name = "google/pegasus-large"
-tokenizer = PegasusTokenizer.from_pretrained(model_name)
-model = PegasusForConditionalGeneration.from_pretrained(model_name)
+_tokenizer = None
+_model = None
+_load_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_ready = threading.Event()
+_load_error = None
+_warmup_thread = None
+
+
+def get_summarizer():
+    """Return (tokenizer, model), loading them once in a thread-safe way"""
+    global _tokenizer, _model, _load_error
+    if _ready.is_set():
+        return _tokenizer, _model
+    with _load_lock:
+        if not _ready.is_set():
+            try:
+                _tokenizer = PegasusTokenizer.from_pretrained(model_name)
+                if mmap_enabled():
+                    _model = load_mmap_model(PegasusForConditionalGeneration, model_name)
+                else:
+                    _model = PegasusForConditionalGeneration.from_pretrained(model_name)
+                _load_error = None
+                _ready.set()
+            except Exception as e:
+                _load_error = str(e)
+                raise
+    return _tokenizer, _model
+
+
+def get_tokenizer():
+    return get_summarizer()[0]
+
+
+def warmup(background=True):
+    """Load Pegasus ahead of the first request, by default on a daemon thread"""
+    global _warmup_thread
+
+    def run():
+        try:
+            get_summarizer()
+        except Exception as e:
+            print(f"Summarizer warmup failed: {e}")
+
+    if not background:
+        run()
+        return None
+    with _warmup_lock:
+        if _ready.is_set() or (_warmup_thread is not None and _warmup_thread.is_alive()):
+            return _warmup_thread
+        _warmup_thread = threading.Thread(target=run, name="pegasus-warmup", daemon=True)
+        _warmup_thread.start()
+        return _warmup_thread
+
+
+def is_ready():
+    """True once the tokenizer and model are loaded"""
+    return _ready.is_set()
+
+
+def readiness():
+    """Load state for health checks and the UI"""
+    loading = _load_lock.locked() or (_warmup_thread is not None and _warmup_thread.is_alive())
+    return {"model": model_name, "ready": is_ready(), "loading": loading and not is_ready(), "error": _load_error}
 
 
 def chunk_text_tokenwise(text, max_chunk_tokens=512):
+    # Legacy string chunker, kept as the baseline in summarization_benchmark
+    tokenizer = get_tokenizer()
     tokens = tokenizer.tokenize(text)
     chunks = []
     for i in range(0, len(tokens), max_chunk_tokens):
@@ -26,17 +124,150 @@ def chunk_text_tokenwise(text, max_chunk_tokens=512):
     return chunks
 
 
-def generate_summary(text, max_length=40, min_length=10, length_penalty=1.0, num_beams=3):
-    prompted_text = f"Summarize the following text clearly and concisely without adding any external information: {text}"
-    inputs = tokenizer([prompted_text], truncation=True, padding='longest', return_tensors="pt")
+# Length presets used by the Summarize tab
+SUMMARY_PRESETS = {
+    "short": {"max_length": 45, "min_length": 10, "length_penalty": 1.0, "num_beams": 3},
+    "medium": {"max_length": 70, "min_length": 40, "length_penalty": 1.5, "num_beams": 5},
+    "long": {"max_length": 100, "min_length": 80, "length_penalty": 2.0, "num_beams": 6},
+}
+
+SUMMARY_PROMPT = "Summarize the following text clearly and concisely without adding any external information: {text}"
+
+# Extra decoding settings for the last pass over reduced chunk summaries
+FINAL_PASS_KWARGS = {"temperature": 0.3, "no_repeat_ngram_size": 4, "repetition_penalty": 2.5}
+
+summary_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Get or create the shared summary cache"""
+    global summary_cache
+    with _cache_lock:
+        if summary_cache is None:
+            disk_path = os.path.join(SUMMARY_CACHE_DIR, "summary_cache.sqlite3") if SUMMARY_CACHE_DIR else None
+            summary_cache = ResultCache(SUMMARY_CACHE_MAX_BYTES, SUMMARY_CACHE_TTL_SECONDS, disk_path)
+        return summary_cache
+
+
+def summary_key(function, text, params):
+    """sha256 of the whitespace-normalized text plus the model and generation settings"""
+    digest = hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+    return make_key(function, model_name, digest, params)
+
+
+def cached_summary(function, text, params, compute):
+    """Return the cached result for (function, text, params), computing and storing it on a miss"""
+    if not SUMMARY_CACHE_ENABLED:
+        return compute()
+    cache = get_summary_cache()
+    key = summary_key(function, text, params)
+    cached = cache.get(key)
+    if cached is not None:
+        cache_hits.inc(function)
+        return cached
+    cache_misses.inc(function)
+    result = compute()
+    cache.set(key, result)
+    return result
+
+
+def cache_stats():
+    """Hit rate overall and per function, plus the cache's size"""
+    hits, misses = cache_hits.snapshot(), cache_misses.snapshot()
+    by_function = {}
+    for function in sorted(set(hits) | set(misses)):
+        h, m = hits.get(function, 0.0), misses.get(function, 0.0)
+        by_function[function] = {"hits": h, "misses": m, "hit_rate": h / (h + m) if h + m else 0.0}
+    total_hits, total_misses = sum(hits.values()), sum(misses.values())
+    stats = {
+        "enabled": SUMMARY_CACHE_ENABLED,
+        "hits": total_hits,
+        "misses": total_misses,
+        "hit_rate": total_hits / (total_hits + total_misses) if total_hits + total_misses else 0.0,
+        "by_function": by_function,
+    }
+    if SUMMARY_CACHE_ENABLED:
+        stats.update(get_summary_cache().stats())
+    return stats
+
+
+def get_bad_word_ids():
     bad_words = [
         "series", "part", "article", "copyright", "postmedia", 
         "http", "www", ".com", "email", "share", "click",
         "including", "such as"  # Add these to prevent list generation
     ]
-    bad_word_ids = [tokenizer.encode(word, add_special_tokens=False) for word in bad_words]
+    tokenizer = get_tokenizer()
+    return [tokenizer.encode(word, add_special_tokens=False) for word in bad_words]
+
+
+def prompt_ids():
+    """Token ids of the summary prompt without any text"""
+    return get_tokenizer()(SUMMARY_PROMPT.format(text="").rstrip(), add_special_tokens=False).input_ids
+
+
+def chunk_token_ids(text, max_chunk_tokens=512, overlap_tokens=None):
+    """
+    Tokenize text once, sentence by sentence, and pack whole sentences
+    into prompts of at most max_chunk_tokens ids (prompt and EOS
+    included). Trailing sentences of up to overlap_tokens are repeated
+    at the start of the next chunk; a sentence longer than a chunk is
+    split on ids. Returns ready-to-generate id lists.
+    """
+    tokenizer = get_tokenizer()
+    prefix = prompt_ids()
+    budget = max(16, max_chunk_tokens - len(prefix) - 1)
+    overlap_tokens = min(CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens, budget // 2)
+
+    sentences = [s for paragraph in split_paragraphs(text) for s in paragraph]
+    if not sentences:
+        return []
+    pieces = []
+    for ids in tokenizer(sentences, add_special_tokens=False).input_ids:
+        pieces.extend(ids[i:i + budget] for i in range(0, len(ids), budget))
+
+    chunks, current, size = [], [], 0
+    for ids in pieces:
+        if current and size + len(ids) > budget:
+            chunks.append(current)
+            # Carry the last sentences over as context for the next chunk
+            carried, carried_size = [], 0
+            for previous in reversed(current):
+                if carried_size + len(previous) > overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_size += len(previous)
+            while carried and carried_size + len(ids) > budget:
+                carried_size -= len(carried.pop(0))
+            current, size = carried, carried_size
+        current.append(ids)
+        size += len(ids)
+    chunks.append(current)
+
+    return [prefix + [t for ids in chunk for t in ids] + [tokenizer.eos_token_id] for chunk in chunks]
+
+
+def raise_if_cancelled(cancel):
+    if is_cancelled(cancel):
+        raise RequestCancelled(cancel.reason)
+
+
+def _generate(input_ids, attention_mask, max_length, min_length, length_penalty, num_beams, cancel_tokens=None,
+              **generate_kwargs):
+    """
+    generate() plus decode. cancel_tokens (one per row) end cancelled rows
+    at once and stop the call outright when every row is cancelled.
+    """
+    tokenizer, model = get_summarizer()
+    bad_word_ids = get_bad_word_ids()
+    if cancel_tokens and any(t is not None for t in cancel_tokens):
+        generate_kwargs["logits_processor"] = LogitsProcessorList(
+            [CancelledRowsProcessor(cancel_tokens, tokenizer.eos_token_id, max_length)])
+        generate_kwargs["stopping_criteria"] = StoppingCriteriaList([AllCancelledCriteria(cancel_tokens)])
     summary_ids = model.generate(
-        inputs.input_ids,
+        input_ids,
+        attention_mask=attention_mask,
         max_length=max_length,
         min_length=min_length,
         length_penalty=length_penalty,
@@ -44,46 +275,432 @@ def generate_summary(text, max_length=40, min_length=10, length_penalty=1.0, num
         #no_repeat_ngram_size=2,
         early_stopping=True,
         bad_words_ids=bad_word_ids,
+        **generate_kwargs,
     )
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-    return summary
+    return tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+
+
+def generate_summaries(texts, max_length=40, min_length=10, length_penalty=1.0, num_beams=3, **generate_kwargs):
+    """Summarize several texts with one padded generate() call"""
+    prompted_texts = [SUMMARY_PROMPT.format(text=text) for text in texts]
+    inputs = get_tokenizer()(prompted_texts, truncation=True, padding='longest', return_tensors="pt")
+    return _generate(inputs.input_ids, inputs.attention_mask, max_length, min_length, length_penalty, num_beams,
+                     **generate_kwargs)
+
+
+def pad_ids(id_lists):
+    """Right-pad id lists into (input_ids, attention_mask) tensors"""
+    width = max(len(ids) for ids in id_lists)
+    input_ids = torch.full((len(id_lists), width), get_tokenizer().pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros_like(input_ids)
+    for row, ids in enumerate(id_lists):
+        input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[row, :len(ids)] = 1
+    return input_ids, attention_mask
 
 
-def summarize_chunk(chunk, params):
-    return generate_summary(
-        chunk,
-        max_length=params["max_length"],
-        min_length=params["min_length"],
-        length_penalty=params["length_penalty"],
-        num_beams=params["num_beams"],
+def generate_from_ids(id_lists, max_length=40, min_length=10, length_penalty=1.0, num_beams=3, **generate_kwargs):
+    """Summarize pre-encoded prompts (see chunk_token_ids) without re-tokenizing them"""
+    input_ids, attention_mask = pad_ids(id_lists)
+    return _generate(input_ids, attention_mask, max_length, min_length, length_penalty, num_beams,
+                     **generate_kwargs)
+
+
+def generate_summary(text, max_length=40, min_length=10, length_penalty=1.0, num_beams=3, **generate_kwargs):
+    params = dict(generate_kwargs, max_length=max_length, min_length=min_length,
+                  length_penalty=length_penalty, num_beams=num_beams)
+    return cached_summary(
+        "generate_summary", text, params,
+        lambda: generate_summaries([text], max_length, min_length, length_penalty, num_beams, **generate_kwargs)[0],
     )
 
 
-def summarize_long_text(text, chunk_token_limit=512, summary_params=None):
+def summarize_chunks(chunks, params, batch_size=None, cancel=None):
+    """
+    Summarize id chunks from chunk_token_ids as padded batches. Chunks
+    are sorted by length so each batch pads as little as possible;
+    results come back in order. Raises RequestCancelled once cancel fires.
+    """
+    batch_size = max(1, batch_size or CHUNK_BATCH_SIZE)
+    order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+    summaries = [None] * len(chunks)
+    for start in range(0, len(order), batch_size):
+        raise_if_cancelled(cancel)
+        batch = order[start:start + batch_size]
+        outputs = generate_from_ids(
+            [chunks[i] for i in batch],
+            max_length=params["max_length"],
+            min_length=params["min_length"],
+            length_penalty=params["length_penalty"],
+            num_beams=params["num_beams"],
+            cancel_tokens=[cancel] * len(batch),
+        )
+        for i, summary in zip(batch, outputs):
+            summaries[i] = summary
+    raise_if_cancelled(cancel)
+    return summaries
+
+
+def iter_text_blocks(source, block_chars=None):
+    """
+    Group a string, file object or iterable of strings into blocks of
+    about block_chars, breaking on blank lines where possible. Pieces are
+    joined as-is, like lines read from a file.
+    """
+    block_chars = block_chars or STREAM_BLOCK_CHARS
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    buffer, size = [], 0
+    for piece in source:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= block_chars and (not piece.strip() or size >= 4 * block_chars):
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_chunk_ids(source, chunk_token_limit=512, overlap_tokens=None, block_chars=None):
+    """Id chunks of a streamed source, one block in memory at a time"""
+    for block in iter_text_blocks(source, block_chars):
+        yield from chunk_token_ids(block, max_chunk_tokens=chunk_token_limit, overlap_tokens=overlap_tokens)
+
+
+def reduce_to_window(chunks, params, chunk_token_limit=512, batch_size=None, overlap_tokens=None, cancel=None):
+    """
+    Map-reduce id chunks until their summaries fit the model window.
+    Level 0 consumes chunks lazily, a few batches at a time; each later
+    level re-chunks the joined summaries of the one before. Returns the
+    prompt ids for the final pass and a per-level report.
+    """
+    tokenizer = get_tokenizer()
+    batch_size = max(1, batch_size or CHUNK_BATCH_SIZE)
+    levels = []
+
+    # Level 0: buffer a few batches so sorting by length still cuts padding
+    started, summaries, pending, count = time.perf_counter(), [], [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        count += 1
+        if len(pending) >= 4 * batch_size:
+            summaries.extend(summarize_chunks(pending, params, batch_size, cancel))
+            pending = []
+    if pending:
+        summaries.extend(summarize_chunks(pending, params, batch_size, cancel))
+    levels.append({"level": 0, "chunks": count, "seconds": time.perf_counter() - started})
+
+    while True:
+        aggregate = " ".join(summaries)
+        window = chunk_token_ids(aggregate, max_chunk_tokens=MODEL_MAX_TOKENS, overlap_tokens=0)
+        if len(window) <= 1 or len(levels) >= MAX_REDUCE_DEPTH:
+            break
+        started = time.perf_counter()
+        level_chunks = chunk_token_ids(aggregate, max_chunk_tokens=chunk_token_limit, overlap_tokens=overlap_tokens)
+        summaries = summarize_chunks(level_chunks, params, batch_size, cancel)
+        levels.append({"level": len(levels), "chunks": len(level_chunks), "seconds": time.perf_counter() - started})
+
+    # Past MAX_REDUCE_DEPTH the first window is kept, as truncation would
+    final_ids = window[0] if window else prompt_ids() + [tokenizer.eos_token_id]
+    return final_ids, {"depth": len(levels), "truncated": len(window) > 1, "levels": levels}
+
+
+def generate_summary_stream(text, max_length=40, min_length=10, chunk_token_limit=512, chunk_params=None,
+                            cancel=None):
+    """
+    Stream a summary as Pegasus decodes it: yields {"token": ...} events and
+    a final {"done": True, "summary": ...}. Token streaming does not support
+    beam search, so the streamed pass decodes greedily. Long inputs are
+    chunk-summarized first and only the final pass is streamed. Closing
+    the iterator early (the client went away) stops the background generate().
+    """
+    cancel = cancel or CancelToken()
+    tokenizer, model = get_summarizer()
+    chunks = chunk_token_ids(text, max_chunk_tokens=chunk_token_limit)
+    if len(chunks) > 1:
+        final_ids, _ = reduce_to_window(chunks, chunk_params or SUMMARY_PRESETS["long"], chunk_token_limit,
+                                        cancel=cancel)
+        input_ids, attention_mask = pad_ids([final_ids])
+    else:
+        # Short input: the chunker's ids are the prompt, no second tokenization
+        input_ids, attention_mask = pad_ids(chunks or [prompt_ids() + [tokenizer.eos_token_id]])
+    if cancel.cancelled():
+        raise RequestCancelled(cancel.reason)
+
+    pieces = []
+    try:
+        for piece in iter_generated_text(
+            tokenizer,
+            model.generate,
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            max_length=max_length,
+            min_length=min_length,
+            num_beams=1,
+            bad_words_ids=get_bad_word_ids(),
+            stopping_criteria=StoppingCriteriaList([AllCancelledCriteria([cancel])]),
+        ):
+            pieces.append(piece)
+            yield {"token": piece}
+    except GeneratorExit:
+        cancel.cancel("disconnect")
+        raise
+    if cancel.cancelled():
+        raise RequestCancelled(cancel.reason)
+
+    yield {"done": True, "summary": "".join(pieces).strip()}
+
+
+def summarize_tree(source, chunk_token_limit=512, summary_params=None, batch_size=None, overlap_tokens=None,
+                   cancel=None):
+    """
+    Summarize a string, file object or iterable of strings of any length
+    by recursive map-reduce. Returns (summary, report) where the report
+    gives the depth, chunk count and seconds of each level.
+    """
     if summary_params is None:
         summary_params = {"max_length": 100, "min_length": 80, "length_penalty": 2.0, "num_beams": 6}
-    
-    chunks = chunk_text_tokenwise(text, max_chunk_tokens=chunk_token_limit)
 
-    # Parallel summarize chunks
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        chunk_summaries = list(executor.map(lambda c: summarize_chunk(c, summary_params), chunks))
-
-    aggregated_summary = " ".join(chunk_summaries)
+    started = time.perf_counter()
+    chunks = iter_chunk_ids(source, chunk_token_limit=chunk_token_limit, overlap_tokens=overlap_tokens)
+    final_ids, report = reduce_to_window(chunks, summary_params, chunk_token_limit, batch_size, overlap_tokens, cancel)
 
     # Hierarchical summarization
-    final_summary = generate_summary(
-        aggregated_summary,
+    final_started = time.perf_counter()
+    final_summary = generate_from_ids(
+        [final_ids],
         max_length=summary_params["max_length"],
         min_length=summary_params["min_length"],
         length_penalty=summary_params["length_penalty"],
-        temperature=0.3,
-        no_repeat_ngram_size=4,
-        repetition_penalty=2.5,
         num_beams=summary_params["num_beams"],
-    )
-    return final_summary
+        cancel_tokens=[cancel],
+        **FINAL_PASS_KWARGS,
+    )[0]
+    raise_if_cancelled(cancel)
+    report["final_seconds"] = time.perf_counter() - final_started
+    report["total_seconds"] = time.perf_counter() - started
+    return final_summary, report
+
+
+def summarize_file(path, **kwargs):
+    """summarize_tree over a text file, read a block at a time"""
+    with open(path, encoding="utf-8") as f:
+        return summarize_tree(f, **kwargs)
+
+
+def count_tokens(sentences):
+    """Summarizer token count of each sentence, as chunk_token_ids counts them"""
+    return [len(ids) for ids in get_tokenizer()(sentences, add_special_tokens=False).input_ids]
+
+
+def extract_for_window(text):
+    """The top-ranked sentences of text that fit one model window"""
+    budget = MODEL_MAX_TOKENS - len(prompt_ids()) - 1
+    return extract(text, token_budget=budget, count_tokens=count_tokens)
+
+
+def window_ids(text):
+    """Prompt ids for the first model window of text"""
+    window = chunk_token_ids(text, max_chunk_tokens=MODEL_MAX_TOKENS, overlap_tokens=0)
+    return window[0] if window else prompt_ids() + [get_tokenizer().eos_token_id]
+
+
+def summarize_fast(text, summary_params=None, cancel=None):
+    """
+    Fast mode: keep only the sentences an extractive ranking picks to fill
+    one model window, then run a single abstractive pass over them
+    instead of one per chunk.
+    """
+    if summary_params is None:
+        summary_params = SUMMARY_PRESETS["long"]
+    summary = generate_from_ids(
+        [window_ids(extract_for_window(text))],
+        max_length=summary_params["max_length"],
+        min_length=summary_params["min_length"],
+        length_penalty=summary_params["length_penalty"],
+        num_beams=summary_params["num_beams"],
+        cancel_tokens=[cancel],
+    )[0]
+    raise_if_cancelled(cancel)
+    return summary
+
+
+def describe_report(report):
+    """One line summary of a summarize_tree report"""
+    levels = ", ".join(f"level {l['level']}: {l['chunks']} chunks in {l['seconds']:.1f}s" for l in report["levels"])
+    truncated = " (truncated at max depth)" if report["truncated"] else ""
+    return (f"depth {report['depth']}{truncated}; {levels}; final pass {report['final_seconds']:.1f}s, "
+            f"total {report['total_seconds']:.1f}s")
+
+
+def summarize_long_text(text, chunk_token_limit=512, summary_params=None, batch_size=None, overlap_tokens=None,
+                        fast=False, with_report=False, cancel=None):
+    """
+    Map-reduce summary of text of any length (or the extractive fast
+    path). Each computed tree report is logged; with_report=True returns
+    (summary, report), where the report is None for cache hits and fast mode.
+    Raises RequestCancelled once cancel fires; nothing is cached then.
+    """
+    params = {"chunk_token_limit": chunk_token_limit, "summary_params": summary_params,
+              "overlap_tokens": overlap_tokens, "fast": fast}
+    reports = []
+
+    def compute():
+        if fast:
+            return summarize_fast(text, summary_params, cancel)
+        summary, report = summarize_tree(text, chunk_token_limit, summary_params, batch_size, overlap_tokens, cancel)
+        print(f"Tree summary: {describe_report(report)}")
+        reports.append(report)
+        return summary
+
+    summary = cached_summary("summarize_long_text", text, params, compute)
+    if with_report:
+        return summary, (reports[0] if reports else None)
+    return summary
+
+
+def encode_ids(id_lists):
+    """Run the encoder once over padded prompts; returns (attention_mask, hidden_states)"""
+    _, model = get_summarizer()
+    input_ids, attention_mask = pad_ids(id_lists)
+    with torch.no_grad():
+        encoder_outputs = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask, return_dict=True)
+    return attention_mask, encoder_outputs.last_hidden_state
+
+
+def summarize_lengths(text, lengths=None, chunk_token_limit=512, fast=False, cancel=None):
+    """
+    Summaries of text for several SUMMARY_PRESETS lengths from a single
+    encoder pass; each length only decodes. Text longer than the model
+    window is map-reduced first, or with fast=True cut down to its top
+    extracted sentences. Results are cached per length, so only missing
+    lengths are generated. Raises RequestCancelled once cancel fires.
+    """
+    lengths = list(lengths or SUMMARY_PRESETS)
+    unknown = [length for length in lengths if length not in SUMMARY_PRESETS]
+    if unknown:
+        raise ValueError(f"Unknown summary length: {', '.join(unknown)}")
+
+    cache = get_summary_cache() if SUMMARY_CACHE_ENABLED else None
+    keys = {length: summary_key("summarize_lengths", text, dict(SUMMARY_PRESETS[length], fast=fast))
+            for length in lengths}
+    summaries = {}
+    for length in lengths:
+        cached = cache.get(keys[length]) if cache else None
+        if cached is not None:
+            summaries[length] = cached
+            cache_hits.inc("summarize_lengths")
+        elif cache:
+            cache_misses.inc("summarize_lengths")
+    missing = [length for length in lengths if length not in summaries]
+    if not missing:
+        return summaries
+
+    window = chunk_token_ids(text, max_chunk_tokens=MODEL_MAX_TOKENS, overlap_tokens=0)
+    if len(window) > 1 and fast:
+        ids = window_ids(extract_for_window(text))
+        extra_kwargs = {}
+    elif len(window) > 1:
+        chunks = chunk_token_ids(text, max_chunk_tokens=chunk_token_limit)
+        ids, _ = reduce_to_window(chunks, SUMMARY_PRESETS["long"], chunk_token_limit, cancel=cancel)
+        extra_kwargs = FINAL_PASS_KWARGS
+    else:
+        ids = window[0] if window else prompt_ids() + [get_tokenizer().eos_token_id]
+        extra_kwargs = {}
+
+    attention_mask, hidden_states = encode_ids([ids])
+    for length in missing:
+        raise_if_cancelled(cancel)
+        preset = SUMMARY_PRESETS[length]
+        # generate() expands encoder outputs in place, so each call gets a fresh wrapper
+        summaries[length] = _generate(
+            None,
+            attention_mask,
+            preset["max_length"],
+            preset["min_length"],
+            preset["length_penalty"],
+            preset["num_beams"],
+            encoder_outputs=BaseModelOutput(last_hidden_state=hidden_states),
+            cancel_tokens=[cancel],
+            **extra_kwargs,
+        )[0]
+        # Cut-short summaries are never cached
+        raise_if_cancelled(cancel)
+        if cache:
+            cache.set(keys[length], summaries[length])
+    return {length: summaries[length] for length in lengths}
+
+
+
+def summarize_batch(texts, lengths=("medium",), cancel_tokens=None):
+    """
+    Summaries of several texts at each of lengths. The texts share one
+    padded encoder pass and every length decodes against it, so requests
+    from different users batch together and no text is encoded twice.
+    Texts longer than the model window go through summarize_lengths.
+    Returns one {length: summary} per text; shares cache entries with
+    summarize_lengths. cancel_tokens (one per text) stop work for
+    requests nobody is waiting for; their summaries come back empty.
+    """
+    lengths = list(lengths)
+    cancel_tokens = cancel_tokens or [None] * len(texts)
+    cache = get_summary_cache() if SUMMARY_CACHE_ENABLED else None
+    keys = [{length: summary_key("summarize_lengths", text, dict(SUMMARY_PRESETS[length], fast=False))
+             for length in lengths} for text in texts]
+    summaries = [{} for _ in texts]
+
+    batch, batch_ids = [], []
+    for i, text in enumerate(texts):
+        if is_cancelled(cancel_tokens[i]):
+            continue
+        window = chunk_token_ids(text, max_chunk_tokens=MODEL_MAX_TOKENS, overlap_tokens=0)
+        if len(window) > 1:
+            # Counted, cached and map-reduced by summarize_lengths itself
+            try:
+                summaries[i] = summarize_lengths(text, lengths, cancel=cancel_tokens[i])
+            except RequestCancelled:
+                pass
+            continue
+        for length in lengths:
+            cached = cache.get(keys[i][length]) if cache else None
+            if cached is not None:
+                summaries[i][length] = cached
+                cache_hits.inc("summarize_lengths")
+            elif cache:
+                cache_misses.inc("summarize_lengths")
+        if len(summaries[i]) < len(lengths):
+            batch.append(i)
+            batch_ids.append(window[0] if window else prompt_ids() + [get_tokenizer().eos_token_id])
 
+    if batch:
+        attention_mask, hidden_states = encode_ids(batch_ids)
+        for length in lengths:
+            rows = [row for row, i in enumerate(batch)
+                    if length not in summaries[i] and not is_cancelled(cancel_tokens[i])]
+            if not rows:
+                continue
+            index = torch.tensor(rows, device=hidden_states.device)
+            preset = SUMMARY_PRESETS[length]
+            # generate() expands encoder outputs in place, so each call gets a fresh wrapper
+            outputs = _generate(
+                None,
+                attention_mask.index_select(0, index),
+                preset["max_length"],
+                preset["min_length"],
+                preset["length_penalty"],
+                preset["num_beams"],
+                encoder_outputs=BaseModelOutput(last_hidden_state=hidden_states.index_select(0, index)),
+                cancel_tokens=[cancel_tokens[batch[row]] for row in rows],
+            )
+            for row, summary in zip(rows, outputs):
+                i = batch[row]
+                # Cut-short summaries are never kept
+                if is_cancelled(cancel_tokens[i]):
+                    continue
+                summaries[i][length] = summary
+                if cache:
+                    cache.set(keys[i][length], summary)
+    return [{length: summary.get(length, "") for length in lengths} for summary in summaries]
 
 if __name__ == "__main__":
     # Commented out to avoid error if running without this text
@@ -100,7 +717,7 @@ if __name__ == "__main__":
     # Check that input_text is defined before proceeding (avoid runtime error)
     if 'input_text' in globals():
         for params in summary_params:
-            if params["name"] == "long_summary.txt" and len(tokenizer.tokenize(input_text)) > 512:
+            if params["name"] == "long_summary.txt" and len(get_tokenizer().tokenize(input_text)) > 512:
                 summary = summarize_long_text(input_text, chunk_token_limit=512, summary_params=params)
             else:
                 summary = generate_summary(
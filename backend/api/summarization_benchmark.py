@@ -0,0 +1,100 @@
+# backend/api/summarization_benchmark.py
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from backend.api import summarization
+from backend.api.summarization import (SUMMARY_PRESETS, chunk_text_tokenwise, chunk_token_ids, generate_summary,
+                                       get_tokenizer, summarize_chunks)
+
+SAMPLE_INPUT = os.path.join(os.path.dirname(__file__), "summarization_samples", "input.txt")
+DOCUMENT_TOKENS = [2000, 5000, 20000]
+
+def build_document(target_tokens: int, sample_path: str = SAMPLE_INPUT) -> str:
+    """Repeat the sample article until the document reaches roughly target_tokens"""
+    with open(sample_path, encoding="utf-8") as f:
+        sample = f.read().strip()
+    sample_tokens = max(1, len(get_tokenizer().tokenize(sample)))
+    repeats = max(1, round(target_tokens / sample_tokens))
+    return "\n\n".join([sample] * repeats)
+
+def summarize_chunks_threaded(chunks: List[str], params: Dict, workers: int = 4) -> List[str]:
+    """The previous approach: one batch-size-1 generate() per string chunk on a thread pool"""
+    def summarize(chunk):
+        return generate_summary(chunk, max_length=params["max_length"], min_length=params["min_length"],
+                                length_penalty=params["length_penalty"], num_beams=params["num_beams"])
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(summarize, chunks))
+
+def time_call(fn, repeats: int) -> float:
+    """Mean wall time of fn() in seconds"""
+    total = 0.0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        total += time.perf_counter() - started
+    return total / repeats
+
+def benchmark_document(target_tokens: int, batch_sizes: List[int], length: str = "long",
+                       chunk_token_limit: int = 512, repeats: int = 1) -> Dict:
+    """
+    Chunk-stage time of the old string chunks on a thread pool against
+    sentence-aware id chunks in padded batches of each size
+    """
+    document = build_document(target_tokens)
+    chunks = chunk_text_tokenwise(document, max_chunk_tokens=chunk_token_limit)
+    id_chunks = chunk_token_ids(document, max_chunk_tokens=chunk_token_limit)
+    params = SUMMARY_PRESETS[length]
+
+    threaded = time_call(lambda: summarize_chunks_threaded(chunks, params), repeats)
+    batched = {
+        str(batch_size): time_call(lambda: summarize_chunks(id_chunks, params, batch_size=batch_size), repeats)
+        for batch_size in batch_sizes
+    }
+    return {
+        "target_tokens": target_tokens,
+        "document_tokens": len(get_tokenizer().tokenize(document)),
+        "chunks": len(chunks),
+        "id_chunks": len(id_chunks),
+        "threadpool_seconds": threaded,
+        "batched_seconds": batched,
+        "speedup": {size: threaded / seconds if seconds else 0.0 for size, seconds in batched.items()},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Thread-pool vs batched chunk summarization")
+    parser.add_argument("--tokens", nargs="+", type=int, default=DOCUMENT_TOKENS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8, 16])
+    parser.add_argument("--length", default="long", choices=list(SUMMARY_PRESETS))
+    parser.add_argument("--chunk-token-limit", type=int, default=512)
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    # Every repeat must actually run the model
+    summarization.SUMMARY_CACHE_ENABLED = False
+
+    # Load the model outside the timed region
+    generate_summary("Warm up the summarizer.")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cpu_count": os.cpu_count(),
+        "settings": vars(args),
+        "results": [
+            benchmark_document(tokens, args.batch_sizes, args.length, args.chunk_token_limit, args.repeats)
+            for tokens in args.tokens
+        ],
+    }
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    out_folder = "reports"
+    os.makedirs(out_folder, exist_ok=True)
+    outpath = os.path.join(out_folder, f"summarization_benchmark_{stamp}.json")
+    with open(outpath, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✅ Summarization benchmark saved to: {outpath}")
+    print(json.dumps(report["results"], indent=2))
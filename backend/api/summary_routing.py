@@ -0,0 +1,222 @@
+"""
+Latency-tiered routing between summarizers.
+Tiers are ordered from fastest to best. Each request goes to the best
+tier whose estimated latency for the input length, with the summaries
+in flight or queued sharing the CPU, meets the latency target. Estimates
+start from the configured costs and then follow observed latencies.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+import torch
+from transformers import StoppingCriteriaList
+
+from backend.paraphrasing import metrics
+from backend.paraphrasing.cancellation import AllCancelledCriteria, CancelToken, RequestCancelled
+from backend.paraphrasing.service import get_pipe
+from backend.api import summarization
+from backend.api.extractive import estimate_tokens
+
+# Default latency target per request in ms; 0 always picks the best tier
+LATENCY_TARGET_MS = float(os.getenv("SUMMARY_LATENCY_TARGET_MS", "20000"))
+# Comma separated tier names to enable, fastest first (default: all)
+ENABLED_TIERS = [t.strip() for t in os.getenv("SUMMARY_TIERS", "").split(",") if t.strip()]
+
+# Which tier served each summary request
+tier_counter = metrics.counter("summary_tier")
+
+
+class SummaryTier(ABC):
+    """A summarizer with a latency model: base_ms + ms_per_token * input tokens"""
+
+    def __init__(self, name: str, model_id: str, max_input_tokens: float, base_ms: float, ms_per_token: float):
+        self.name = name
+        self.model_id = model_id
+        self.max_input_tokens = max_input_tokens
+        self.base_ms = base_ms
+        self.ms_per_token = ms_per_token
+
+    def available(self) -> bool:
+        return True
+
+    def estimate_ms(self, input_tokens: int, load: int = 0) -> float:
+        # Summaries running alongside share the CPU and queued ones wait on this one, each adding a share
+        return (self.base_ms + self.ms_per_token * input_tokens) * (1 + load)
+
+    def record(self, input_tokens: int, seconds: float):
+        """Fold an observed latency into the per-token cost"""
+        observed = max(0.0, seconds * 1000.0 - self.base_ms) / max(1, input_tokens)
+        self.ms_per_token = 0.8 * self.ms_per_token + 0.2 * observed
+
+    @abstractmethod
+    def summarize(self, text: str, lengths: List[str], fast: bool = False,
+                  cancel: Optional[CancelToken] = None) -> Dict[str, str]:
+        """Summary of text at each SUMMARY_PRESETS length; raises RequestCancelled once cancel fires"""
+
+
+class T5Tier(SummaryTier):
+    """A T5 checkpoint from the shared model registry, input truncated to its window"""
+
+    def __init__(self, name: str, model_id: str, num_beams: int = 1, max_input_tokens: int = 512,
+                 base_ms: float = 150.0, ms_per_token: float = 1.5):
+        super().__init__(name, model_id, max_input_tokens, base_ms, ms_per_token)
+        self.num_beams = num_beams
+
+    def available(self) -> bool:
+        # Local checkpoints must be on disk; hub models download on first use
+        return not self.model_id.startswith("data/") or os.path.isfile(os.path.join(self.model_id, "config.json"))
+
+    def summarize(self, text: str, lengths: List[str], fast: bool = False,
+                  cancel: Optional[CancelToken] = None) -> Dict[str, str]:
+        pipe = get_pipe(self.model_id)
+        inputs = pipe.tokenizer(["summarize: " + text], truncation=True, max_length=int(self.max_input_tokens),
+                                return_tensors="pt").to(pipe.device)
+        summaries = {}
+        for length in lengths:
+            summarization.raise_if_cancelled(cancel)
+            preset = summarization.SUMMARY_PRESETS[length]
+            with torch.no_grad():
+                output_ids = pipe.model.generate(
+                    **inputs,
+                    max_length=preset["max_length"],
+                    min_length=preset["min_length"],
+                    num_beams=self.num_beams,
+                    length_penalty=preset["length_penalty"],
+                    early_stopping=self.num_beams > 1,
+                    stopping_criteria=StoppingCriteriaList([AllCancelledCriteria([cancel])]),
+                )
+            summarization.raise_if_cancelled(cancel)
+            summaries[length] = pipe.tokenizer.decode(output_ids[0], skip_special_tokens=True).strip()
+        return summaries
+
+
+class PegasusTier(SummaryTier):
+    """The Pegasus summarizer with preset beams; handles any length by map-reduce"""
+
+    def __init__(self, base_ms: float = 1500.0, ms_per_token: float = 12.0):
+        super().__init__("pegasus-large", summarization.model_name, float("inf"), base_ms, ms_per_token)
+
+    def summarize(self, text: str, lengths: List[str], fast: bool = False,
+                  cancel: Optional[CancelToken] = None) -> Dict[str, str]:
+        return summarization.summarize_lengths(text, lengths, fast=fast, cancel=cancel)
+
+
+DEFAULT_TIERS = [
+    T5Tier("t5-small", "t5-small", num_beams=1, base_ms=150.0, ms_per_token=1.5),
+    T5Tier("t5-multi-domain", "data/t5-multi-domain-finetuned", num_beams=2, base_ms=250.0, ms_per_token=2.5),
+    PegasusTier(),
+]
+
+
+class SummaryRouter:
+    def __init__(self, tiers: List[SummaryTier], queued: Optional[Callable[[], int]] = None):
+        self.tiers = tiers
+        # Summaries waiting on the executor that runs this router (e.g. the service's scheduler queue)
+        self.queued = queued
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def inflight(self) -> int:
+        with self._lock:
+            return self._inflight
+
+    def load(self) -> int:
+        """Other summaries running here plus those queued behind them"""
+        return self.inflight() + (self.queued() if self.queued else 0)
+
+    def choose(self, text: str, latency_target_ms: Optional[float] = None) -> Tuple[SummaryTier, bool, float]:
+        """
+        Returns (tier, fast, estimated_ms). Tiers whose window the input
+        exceeds are skipped; when even the best tier misses the target on
+        a long input it runs in extractive fast mode.
+        """
+        target = LATENCY_TARGET_MS if latency_target_ms is None else latency_target_ms
+        tokens = estimate_tokens([text])[0]
+        tiers = [t for t in self.tiers if t.available()]
+        fitting = [t for t in tiers if tokens <= t.max_input_tokens] or tiers[-1:]
+        best = fitting[-1]
+        if not target:
+            return best, False, best.estimate_ms(tokens)
+
+        load = self.load()
+        for tier in reversed(fitting):
+            estimate = tier.estimate_ms(tokens, load)
+            if estimate <= target:
+                return tier, False, estimate
+        # Nothing meets the target: the fastest tier, cut down to one window if the input is long
+        tier = fitting[0]
+        fast = tokens > summarization.MODEL_MAX_TOKENS
+        return tier, fast, tier.estimate_ms(min(tokens, summarization.MODEL_MAX_TOKENS) if fast else tokens, load)
+
+    def summarize(self, text: str, lengths: Optional[List[str]] = None, latency_target_ms: Optional[float] = None,
+                  fast: bool = False, cancel: Optional[CancelToken] = None) -> Dict:
+        """Summaries for each length plus the tier that produced them"""
+        lengths = list(lengths or summarization.SUMMARY_PRESETS)
+        tier, routed_fast, estimate = self.choose(text, latency_target_ms)
+        fast = fast or routed_fast
+        tokens = estimate_tokens([text])[0]
+
+        with self._lock:
+            self._inflight += 1
+        started = time.perf_counter()
+        try:
+            try:
+                summaries = tier.summarize(text, lengths, fast, cancel)
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                best = self.tiers[-1]
+                if tier is best:
+                    raise
+                print(f"Summary tier {tier.name} failed, using {best.name}: {e}")
+                tier = best
+                started = time.perf_counter()
+                summaries = tier.summarize(text, lengths, fast, cancel)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+        seconds = time.perf_counter() - started
+        if seconds * 1000.0 >= tier.base_ms:
+            # Faster than the fixed cost means a cache hit, which says nothing about the model
+            tier.record(min(tokens, summarization.MODEL_MAX_TOKENS) if fast else tokens, seconds)
+        tier_counter.inc(tier.name)
+
+        return {
+            "summaries": summaries,
+            "tier": tier.name,
+            "model": tier.model_id,
+            "fast": fast,
+            "estimated_ms": estimate,
+            "latency_ms": seconds * 1000.0,
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "inflight": self.inflight(),
+            "queued": self.queued() if self.queued else 0,
+            "latency_target_ms": LATENCY_TARGET_MS,
+            "tiers": [
+                {"name": t.name, "model": t.model_id, "available": t.available(),
+                 "base_ms": t.base_ms, "ms_per_token": t.ms_per_token}
+                for t in self.tiers
+            ],
+        }
+
+
+# Global instance
+summary_router: Optional[SummaryRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_summary_router() -> SummaryRouter:
+    """Get or create the shared summary router"""
+    global summary_router
+    with _router_lock:
+        if summary_router is None:
+            tiers = [t for t in DEFAULT_TIERS if not ENABLED_TIERS or t.name in ENABLED_TIERS]
+            summary_router = SummaryRouter(tiers or DEFAULT_TIERS[-1:])
+        return summary_router
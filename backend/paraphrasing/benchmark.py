@@ -0,0 +1,256 @@
+# backend/paraphrasing/benchmark.py
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from . import service
+from .service import LEVEL_PRESETS, get_pipe, paraphrase, paraphrase_batch, resolve_model_id
+from .registry import ENGINES
+
+DEFAULT_CSV = os.path.join(os.path.dirname(__file__), "sample_text_para", "paraphrase_eval.csv")
+
+# Used when the evaluation CSV is not available, so runs stay comparable
+SYNTHETIC_CORPUS = [
+    "Machine learning improves with more data.",
+    "The cat sat on the mat.",
+    "She quickly finished her homework before dinner.",
+    "The company announced record profits this quarter.",
+    "Heavy rain caused delays on the morning commute.",
+    "Regular exercise is good for both body and mind.",
+    "The museum will reopen to visitors next month.",
+    "He forgot his umbrella and got soaked on the way home.",
+    "Scientists discovered a new species of frog in the rainforest.",
+    "Reading before bed helps many people fall asleep faster.",
+    "The team celebrated their victory late into the night.",
+    "Prices at the grocery store have risen sharply this year.",
+    "Our flight was cancelled because of the storm.",
+    "The new software update fixes several security issues.",
+    "Children learn languages more easily than adults.",
+    "The chef prepared a special menu for the holiday season.",
+]
+
+def load_corpus(csv_path: str = DEFAULT_CSV) -> List[str]:
+    """Original sentences from the evaluation CSV, or the bundled synthetic corpus"""
+    if not os.path.exists(csv_path):
+        return list(SYNTHETIC_CORPUS)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        texts = [row["original"].strip() for row in csv.DictReader(f) if row.get("original", "").strip()]
+    return texts or list(SYNTHETIC_CORPUS)
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process right now (None where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class RssSampler:
+    """Samples RSS on a background thread; peak is the highest value seen while running"""
+
+    def __init__(self, interval_seconds: float = 0.01):
+        self.interval = interval_seconds
+        self.start_bytes = current_rss_bytes()
+        self.peak = self.start_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        if self.start_bytes is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+def process_peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of this process since it started (None where
+    unsupported). Cumulative across every case run so far.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def fallback_count() -> float:
+    """Paraphrases served by the beam or word-replacement fallback so far"""
+    tiers = service.fallback_tiers.snapshot()
+    return tiers.get("beam", 0.0) + tiers.get("simple_word_paraphrase", 0.0)
+
+def run_case(texts: List[str], model_name: str = "t5", level: str = "balanced", batch_size: int = 1,
+             engine: str = "eager", max_new_tokens: int = 50, repeats: int = 3) -> Dict:
+    """
+    Latency, throughput, memory and fallback rate for one combination.
+    Batch size 1 goes through paraphrase(); larger sizes call
+    paraphrase_batch on consecutive slices of the corpus. Memory is
+    sampled while this case runs, after its warmup call.
+    """
+    tokenizer = get_pipe(resolve_model_id(model_name), engine).tokenizer
+
+    def call(batch: List[str]) -> List[List[str]]:
+        if len(batch) == 1:
+            outputs, _ = paraphrase(batch[0], level=level, num_return_sequences=1, max_new_tokens=max_new_tokens,
+                                    model_name=model_name, use_cache=False, engine=engine)
+            return [outputs]
+        return [outputs for outputs, _ in paraphrase_batch(batch, level=level, num_return_sequences=1,
+                                                            max_new_tokens=max_new_tokens, model_name=model_name,
+                                                            use_cache=False, engine=engine)]
+
+    # Warm up so export and load time are not measured
+    call(texts[:batch_size])
+
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    fallbacks_before = fallback_count()
+    latencies, generated_tokens, elapsed, items = [], 0, 0.0, 0
+    with RssSampler() as rss:
+        for _ in range(repeats):
+            for batch in batches:
+                started = time.perf_counter()
+                results = call(batch)
+                took = time.perf_counter() - started
+                latencies.append(took * 1000.0)
+                elapsed += took
+                items += len(batch)
+                generated_tokens += sum(len(tokenizer(o).input_ids) for outputs in results for o in outputs)
+
+    return {
+        "model": model_name,
+        "level": level,
+        "batch_size": batch_size,
+        "engine": engine,
+        "calls": len(latencies),
+        "items": items,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "tokens_per_sec": generated_tokens / elapsed if elapsed else 0.0,
+        "items_per_sec": items / elapsed if elapsed else 0.0,
+        # Sampled during this case's timed calls; the process peak also covers earlier cases and loads
+        "peak_rss_bytes": rss.peak,
+        "rss_growth_bytes": rss.peak - rss.start_bytes if rss.peak is not None else None,
+        "process_peak_rss_bytes": process_peak_rss_bytes(),
+        "fallback_rate": (fallback_count() - fallbacks_before) / items if items else 0.0,
+    }
+
+def run_grid(texts: List[str], models: List[str], levels: List[str], batch_sizes: List[int],
+             engines: List[str], max_new_tokens: int = 50, repeats: int = 3) -> List[Dict]:
+    """Every (model, level, batch size, engine) combination; failures are recorded, not raised"""
+    results = []
+    for model_name, engine, level, batch_size in itertools.product(models, engines, levels, batch_sizes):
+        print(f"▶ {model_name} / {engine} / {level} / batch {batch_size}")
+        try:
+            results.append(run_case(texts, model_name=model_name, level=level, batch_size=batch_size,
+                                    engine=engine, max_new_tokens=max_new_tokens, repeats=repeats))
+        except Exception as e:
+            results.append({"model": model_name, "level": level, "batch_size": batch_size,
+                            "engine": engine, "error": str(e)})
+    return results
+
+def decode_steps_saved(texts: List[str], model_name: str = "t5", level: str = "balanced",
+                       max_new_tokens: int = 50, seed: int = 0) -> Dict:
+    """Decoder steps per text with the fixed budget versus the adaptive budget and sentence-end stop"""
+    def run(adaptive: bool) -> float:
+        service.ADAPTIVE_BUDGET = service.SENTENCE_STOP = adaptive
+        # Warm up so the first call's load is not part of the comparison
+        paraphrase_batch(texts[:1], level=level, num_return_sequences=1, max_new_tokens=max_new_tokens,
+                         model_name=model_name, seed=seed, use_cache=False)
+        before = service.decode_steps.snapshot()
+        for text in texts:
+            paraphrase_batch([text], level=level, num_return_sequences=1, max_new_tokens=max_new_tokens,
+                             model_name=model_name, seed=seed, use_cache=False)
+        after = service.decode_steps.snapshot()
+        return (after["sum"] - before["sum"]) / max(1, len(texts))
+
+    saved_settings = (service.ADAPTIVE_BUDGET, service.SENTENCE_STOP)
+    try:
+        fixed = run(False)
+        adaptive = run(True)
+    finally:
+        service.ADAPTIVE_BUDGET, service.SENTENCE_STOP = saved_settings
+
+    return {
+        "texts": len(texts),
+        "max_new_tokens": max_new_tokens,
+        "fixed_steps_per_text": fixed,
+        "adaptive_steps_per_text": adaptive,
+        "steps_saved_pct": 100.0 * (fixed - adaptive) / fixed if fixed else 0.0,
+    }
+
+def run_metadata(csv_path: str, texts: List[str], settings: Dict) -> Dict:
+    """What a later run needs to know to compare against this one"""
+    try:
+        import torch
+        torch_version = torch.__version__
+    except ImportError:
+        torch_version = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": csv_path if os.path.exists(csv_path) else "synthetic",
+        "corpus_size": len(texts),
+        "python": platform.python_version(),
+        "torch": torch_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": settings,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paraphrasing latency, throughput and memory benchmark")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--models", nargs="+", default=["t5"])
+    parser.add_argument("--levels", nargs="+", default=list(LEVEL_PRESETS), choices=list(LEVEL_PRESETS))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--engines", nargs="+", default=["eager"], choices=list(ENGINES))
+    parser.add_argument("--max-new-tokens", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--decode-steps", action="store_true",
+                        help="Also report decoder steps saved by the adaptive budget and sentence-end stop")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.csv)
+    report = {
+        "meta": run_metadata(args.csv, texts, vars(args)),
+        "results": run_grid(texts, args.models, args.levels, args.batch_sizes, args.engines,
+                            max_new_tokens=args.max_new_tokens, repeats=args.repeats),
+    }
+    if args.decode_steps:
+        report["decode_steps"] = decode_steps_saved(texts, model_name=args.models[0],
+                                                    level=args.levels[0], max_new_tokens=args.max_new_tokens)
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    out_folder = "reports"
+    os.makedirs(out_folder, exist_ok=True)
+    outpath = os.path.join(out_folder, f"paraphrase_benchmark_{stamp}.json")
+    with open(outpath, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✅ Benchmark saved to: {outpath}")
+    print(json.dumps(report["results"], indent=2))
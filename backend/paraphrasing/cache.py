@@ -0,0 +1,137 @@
+"""
+Content-addressed result cache for generation services.
+Tier 1 is an in-process LRU bounded by bytes and TTL, tier 2 is an
+optional SQLite file that survives restarts.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+# Cache configuration
+CACHE_ENABLED = os.getenv("PARAPHRASE_CACHE_ENABLED", "0") == "1"
+CACHE_MAX_BYTES = int(os.getenv("PARAPHRASE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv("PARAPHRASE_CACHE_TTL_SECONDS", "3600"))
+CACHE_DIR = os.getenv("PARAPHRASE_CACHE_DIR", "")
+# Root for on-disk caches (exported weights, ONNX graphs, summaries); outside
+# the repo so they are never committed or copied into the image with data/
+CACHE_ROOT = os.getenv("TEXTMORPH_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "textmorph"))
+
+
+def make_key(*parts: Any) -> str:
+    """sha256 over the JSON encoding of every key component"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """SQLite-backed key/value store"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, ttl: float) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row and ttl > 0 and time.time() - row[1] > ttl:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return row
+
+    def set(self, key: str, value: str, created_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, created_at),
+            )
+            self._conn.commit()
+
+
+class ResultCache:
+    """LRU tier with a byte budget and TTL, backed by an optional disk tier"""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 disk_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.disk = DiskTier(disk_path) if disk_path else None
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def _store(self, key: str, encoded: str, created_at: float):
+        size = len(encoded.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= len(old[0].encode("utf-8"))
+            self._entries[key] = (encoded, created_at)
+            self._bytes += size
+            # Evict least recently used entries until back under budget
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._expired(entry[1]):
+                self._entries.pop(key)
+                self._bytes -= len(entry[0].encode("utf-8"))
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+                return json.loads(entry[0])
+
+        if self.disk:
+            row = self.disk.get(key, self.ttl)
+            if row:
+                # Promote disk hits into memory
+                self._store(key, row[0], row[1])
+                return json.loads(row[0])
+        return None
+
+    def set(self, key: str, value: Any):
+        encoded = json.dumps(value, ensure_ascii=False)
+        created_at = time.time()
+        self._store(key, encoded, created_at)
+        if self.disk:
+            self.disk.set(key, encoded, created_at)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "disk": self.disk is not None}
+
+
+# Global instance
+paraphrase_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_paraphrase_cache() -> ResultCache:
+    """Get or create the shared paraphrase cache"""
+    global paraphrase_cache
+    with _cache_lock:
+        if paraphrase_cache is None:
+            disk_path = os.path.join(CACHE_DIR, "paraphrase_cache.sqlite3") if CACHE_DIR else None
+            paraphrase_cache = ResultCache(disk_path=disk_path)
+        return paraphrase_cache
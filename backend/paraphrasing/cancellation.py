@@ -0,0 +1,119 @@
+"""
+Deadlines and cancellation for inference requests.
+Each request carries a CancelToken. The scheduler drops cancelled
+requests before dispatch, and during decoding the rows of cancelled
+requests are forced to EOS so generate() returns early and the
+executor moves on to the next batch.
+"""
+
+import os
+import threading
+import time
+from typing import List, Optional
+
+import torch
+from transformers import LogitsProcessor, StoppingCriteria
+
+from . import metrics
+
+# Default deadline for a request, measured from when it is accepted
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("PARAPHRASE_REQUEST_TIMEOUT", "120"))
+
+# Labelled "<reason>:<stage>", e.g. "deadline:queued" or "disconnect:decoding"
+cancelled_counter = metrics.counter("paraphrase_cancelled")
+# Estimated compute seconds not spent on results nobody would read
+wasted_seconds_avoided = metrics.counter("paraphrase_wasted_seconds_avoided")
+
+
+class RequestCancelled(Exception):
+    """Raised for a request whose client disconnected or whose deadline passed"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Request cancelled: {reason}")
+        self.reason = reason
+
+
+class CancelToken:
+    """Cancellation flag plus an absolute (wall clock) deadline"""
+
+    def __init__(self, timeout_seconds: Optional[float] = REQUEST_TIMEOUT_SECONDS):
+        self.deadline = time.time() + timeout_seconds if timeout_seconds else None
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._recorded = False
+
+    def cancel(self, reason: str = "disconnect"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.cancel("deadline")
+            return True
+        return False
+
+    def __getstate__(self):
+        # Worker processes get a copy that still honours the deadline
+        return {"deadline": self.deadline, "reason": self.reason, "set": self._event.is_set()}
+
+    def __setstate__(self, state):
+        self.deadline = state["deadline"]
+        self.reason = state["reason"]
+        self._event = threading.Event()
+        self._recorded = False
+        if state["set"]:
+            self._event.set()
+
+
+def is_cancelled(token: Optional[CancelToken]) -> bool:
+    return token is not None and token.cancelled()
+
+
+def record_cancel(token: CancelToken, stage: str, avoided_seconds: float = 0.0):
+    """Count a cancellation once per token"""
+    if token._recorded:
+        return
+    token._recorded = True
+    cancelled_counter.inc(f"{token.reason}:{stage}")
+    wasted_seconds_avoided.inc(amount=max(0.0, avoided_seconds))
+
+
+class CancelledRowsProcessor(LogitsProcessor):
+    """Forces EOS on the rows of cancelled requests in a padded batch"""
+
+    def __init__(self, tokens: List[Optional[CancelToken]], eos_token_id: int, max_new_tokens: int):
+        self.tokens = tokens
+        self.eos_token_id = eos_token_id
+        self.max_new_tokens = max_new_tokens
+        self.started = time.perf_counter()
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        flags = [is_cancelled(t) for t in self.tokens]
+        if not any(flags):
+            return scores
+
+        step = input_ids.shape[1] - 1
+        # Each request's share of the remaining decode time
+        per_step = (time.perf_counter() - self.started) / max(1, step) / len(self.tokens)
+        for token, flag in zip(self.tokens, flags):
+            if flag:
+                record_cancel(token, "decoding", per_step * max(0, self.max_new_tokens - step))
+
+        # Rows are prompts expanded by num_return_sequences or num_beams
+        rows = torch.tensor(flags, device=scores.device).repeat_interleave(input_ids.shape[0] // len(flags))
+        scores[rows] = -float("inf")
+        scores[rows, self.eos_token_id] = 0.0
+        return scores
+
+
+class AllCancelledCriteria(StoppingCriteria):
+    """Stops generate() outright once every request in the batch is cancelled"""
+
+    def __init__(self, tokens: List[Optional[CancelToken]]):
+        self.tokens = tokens
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
+        return all(is_cancelled(t) for t in self.tokens)
@@ -0,0 +1,130 @@
+"""
+Allowlisted model catalog with background prefetch.
+Only catalogued models may be requested. The built-in aliases load
+inline as before; any other allowed model is loaded on a background
+thread while the request gets a 202 and a status URL to poll. With a
+worker pool, a model is only ready once every worker has loaded it too.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .registry import DEFAULT_ENGINE, ModelRegistry, registry_key
+from .workers import WORKER_PROCESSES, get_worker_pool
+
+# Extra Hugging Face repos or local model directories, comma separated
+ALLOWED_MODELS = [m.strip() for m in os.getenv("PARAPHRASE_MODEL_ALLOWLIST", "").split(",") if m.strip()]
+# Any model directory under these roots is allowed (works offline)
+LOCAL_MODEL_ROOTS = [r.strip() for r in os.getenv("PARAPHRASE_LOCAL_MODEL_ROOTS", "data").split(",") if r.strip()]
+PREFETCH_WORKERS = int(os.getenv("PARAPHRASE_PREFETCH_WORKERS", "1"))
+
+
+class PrefetchStatus:
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.state = "loading"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            "model_id": self.model_id,
+            "state": self.state,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def is_local_model_dir(model_id: str) -> bool:
+    """A directory with a config.json under one of the local model roots"""
+    if not os.path.isfile(os.path.join(model_id, "config.json")):
+        return False
+    path = os.path.realpath(model_id)
+    return any(os.path.commonpath([path, os.path.realpath(root)]) == os.path.realpath(root)
+               for root in LOCAL_MODEL_ROOTS)
+
+
+class ModelCatalog:
+    """Decides which models may be served and prefetches them off the request path"""
+
+    def __init__(self, registry: ModelRegistry, inline_models: List[str],
+                 allowed: List[str] = ALLOWED_MODELS, workers: int = PREFETCH_WORKERS):
+        self.registry = registry
+        self.inline_models = set(inline_models)
+        self.allowed = set(allowed) | self.inline_models
+        self._status: Dict[str, PrefetchStatus] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="model-prefetch")
+
+    def is_allowed(self, model_id: str) -> bool:
+        return model_id in self.allowed or is_local_model_dir(model_id)
+
+    def is_ready(self, model_id: str, engine: str = DEFAULT_ENGINE) -> bool:
+        """Built-in models load inline; anything else must already be resident here and in the workers"""
+        if model_id in self.inline_models:
+            return True
+        return self.registry.is_resident(registry_key(model_id, engine)) and self.workers_ready(model_id)
+
+    def workers_ready(self, model_id: str) -> bool:
+        return WORKER_PROCESSES <= 0 or model_id in get_worker_pool().warmed
+
+    def prefetch(self, model_id: str, engine: str = DEFAULT_ENGINE, retry_failed: bool = False) -> Dict:
+        """
+        Start a background load unless one is running or the model is
+        resident. A failed load is only retried when asked to.
+        """
+        key = registry_key(model_id, engine)
+        with self._lock:
+            status = self._status.get(key)
+            if self.registry.is_resident(key) and self.workers_ready(model_id):
+                status = status or PrefetchStatus(model_id)
+                status.state = "ready"
+                self._status[key] = status
+            elif status is None or status.state == "ready" or (retry_failed and status.state == "failed"):
+                # New, evicted since it was last ready, or an explicit retry
+                status = PrefetchStatus(model_id)
+                self._status[key] = status
+                self._executor.submit(self._load, key, status)
+            return status.as_dict()
+
+    def _load(self, key: str, status: PrefetchStatus):
+        try:
+            self.registry.get(key)
+            if self.registry.is_resident(key):
+                if WORKER_PROCESSES > 0:
+                    # Batches run in the workers, so they load it as well before it counts as ready
+                    get_worker_pool().warmup(status.model_id)
+                status.state = "ready"
+            else:
+                status.state = "failed"
+                status.error = "Model does not fit in the model memory budget"
+        except Exception as e:
+            status.state = "failed"
+            status.error = str(e)
+        status.finished_at = time.time()
+
+    def status(self, model_id: str, engine: str = DEFAULT_ENGINE) -> Dict:
+        key = registry_key(model_id, engine)
+        with self._lock:
+            status = self._status.get(key)
+            if status is not None and status.state == "ready" and not self.registry.is_resident(key):
+                # Evicted since it was prefetched
+                status = None
+                self._status.pop(key)
+        if status is not None:
+            return status.as_dict()
+        state = "ready" if self.is_ready(model_id, engine) else "not_loaded"
+        return {"model_id": model_id, "state": state, "error": None, "started_at": None, "finished_at": None}
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "allowed": sorted(self.allowed),
+                "local_model_roots": LOCAL_MODEL_ROOTS,
+                "prefetch": [s.as_dict() for s in self._status.values()],
+            }
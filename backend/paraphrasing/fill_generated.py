@@ -2,8 +2,8 @@ import csv
 import requests
 import os
 
-# Backend API URL
-API_URL = "http://127.0.0.1:8000/paraphrasing/generate"
+# Backend API URL (all levels from one encoder pass)
+API_URL = "http://127.0.0.1:8000/paraphrasing/levels"
 
 # Input/Output CSV paths
 INPUT_CSV = "backend/paraphrasing/sample_text_para/paraphrase_eval.csv"
@@ -17,19 +17,20 @@ MAX_NEW_TOKENS = 100
 # Levels
 LEVELS = ["conservative", "balanced", "creative"]
 
-def get_paraphrase(text: str, level: str):
-    """Call backend API for one level and return first paraphrase."""
+def get_paraphrases(text: str):
+    """Call backend API once and return the first paraphrase for every level."""
     resp = requests.post(API_URL, json={
         "text": text,
-        "level": level,
+        "levels": LEVELS,
         "num_return_sequences": NUM_RETURN_SEQUENCES,
         "max_new_tokens": MAX_NEW_TOKENS,
         "model_name": MODEL_NAME
     })
     if resp.status_code == 200:
-        return resp.json()["paraphrases"][0]
+        paraphrases = resp.json()["paraphrases"]
+        return {level: paraphrases[level][0] for level in LEVELS}
     else:
-        return f"ERROR {resp.status_code}"
+        return {level: f"ERROR {resp.status_code}" for level in LEVELS}
 
 def main():
     rows = []
@@ -40,9 +41,7 @@ def main():
             text = row["original"]
             ref = row.get("reference", "")
 
-            generated = {}
-            for level in LEVELS:
-                generated[level] = get_paraphrase(text, level)
+            generated = get_paraphrases(text)
 
             rows.append({
                 "original": text,
@@ -0,0 +1,96 @@
+"""
+Lightweight in-process metrics for the inference services.
+Counters and histograms are thread-safe and exported as plain dicts
+so they can be served straight from a FastAPI route.
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence
+
+# Default histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+LATENCY_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+DECODE_STEP_BUCKETS = (8, 16, 32, 48, 64, 96, 128, 256, 512)
+
+
+class Counter:
+    """Monotonic counter with optional string labels"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label: str = "total", amount: float = 1.0):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0.0) + amount
+
+    def get(self, label: str = "total") -> float:
+        with self._lock:
+            return self._values.get(label, 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram:
+    """Cumulative bucket histogram (Prometheus style upper bounds)"""
+
+    def __init__(self, name: str, buckets: Sequence[float]):
+        self.name = name
+        self.buckets: List[float] = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = cumulative + self._counts[-1]
+            return {
+                "buckets": buckets,
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else 0.0,
+            }
+
+
+_registry: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def counter(name: str) -> Counter:
+    """Get or create a named counter"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Counter(name)
+        return _registry[name]
+
+
+def histogram(name: str, buckets: Optional[Sequence[float]] = None) -> Histogram:
+    """Get or create a named histogram"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, buckets or LATENCY_MS_BUCKETS)
+        return _registry[name]
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Export every registered metric"""
+    with _registry_lock:
+        metrics = dict(_registry)
+    return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
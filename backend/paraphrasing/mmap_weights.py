@@ -0,0 +1,86 @@
+"""
+Memory-mapped model weights.
+A model's state dict is exported once to a cache directory and later
+loads map that file instead of reading it into private memory, so
+every process that loads the same model shares one copy of the
+weights through the page cache.
+"""
+
+import os
+import shutil
+import tempfile
+
+import torch
+from transformers import AutoConfig, GenerationConfig
+
+from .cache import CACHE_ROOT
+
+# Worker pools switch this on in the environment their children inherit. The
+# parent maps too when a pool is configured: multi-level, long-input and
+# streamed requests still run in it and should share the workers' copy
+MMAP_WEIGHTS = (os.getenv("TEXTMORPH_MMAP_WEIGHTS", "0") == "1"
+                or int(os.getenv("PARAPHRASE_WORKER_PROCESSES", "0")) > 0)
+WEIGHTS_DIR = os.getenv("TEXTMORPH_WEIGHTS_DIR", os.path.join(CACHE_ROOT, "mmap-weights"))
+WEIGHTS_FILE = "weights.pt"
+
+
+def mmap_enabled() -> bool:
+    """Weights are only mapped on CPU; GPU loads copy them to the device anyway"""
+    return MMAP_WEIGHTS and not torch.cuda.is_available()
+
+
+def weights_dir(name_or_path: str) -> str:
+    """Cache directory for one model's exported weights"""
+    slug = os.path.abspath(name_or_path) if os.path.isdir(name_or_path) else name_or_path
+    return os.path.join(WEIGHTS_DIR, slug.strip("/\\").replace("/", "--").replace("\\", "--").replace(":", ""))
+
+
+def export_weights(model_cls, name_or_path: str, target: str):
+    """Load a model normally once and write its config and state dict to target"""
+    model = model_cls.from_pretrained(name_or_path)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(target) or ".")
+    try:
+        model.config.save_pretrained(staging)
+        if getattr(model, "generation_config", None) is not None:
+            model.generation_config.save_pretrained(staging)
+        torch.save(model.state_dict(), os.path.join(staging, WEIGHTS_FILE))
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another process finished the same export first; its copy is as good as ours
+            if not os.path.isfile(os.path.join(target, WEIGHTS_FILE)):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_mmap_model(model_cls, name_or_path: str):
+    """
+    Build the model on the meta device and assign memory-mapped tensors
+    to it. Falls back to a regular from_pretrained load if any tensor is
+    left unmaterialised.
+    """
+    target = weights_dir(name_or_path)
+    if not os.path.exists(os.path.join(target, WEIGHTS_FILE)):
+        export_weights(model_cls, name_or_path, target)
+
+    config = AutoConfig.from_pretrained(target)
+    with torch.device("meta"):
+        # Auto classes build from a config with from_config, concrete classes directly
+        model = model_cls.from_config(config) if hasattr(model_cls, "from_config") else model_cls(config)
+
+    state_dict = torch.load(os.path.join(target, WEIGHTS_FILE), mmap=True, weights_only=True, map_location="cpu")
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+
+    if any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+        print(f"Memory-mapped load of {name_or_path} left tensors on meta; loading normally")
+        return model_cls.from_pretrained(name_or_path)
+
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(target)
+    except (OSError, ValueError):
+        pass
+    model.eval()
+    return model
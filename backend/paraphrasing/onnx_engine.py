@@ -0,0 +1,53 @@
+"""
+ONNX Runtime engine for the seq2seq paraphrasers.
+The encoder and decoder-with-past are exported once through optimum,
+cached on disk and served through the same text2text pipeline API as
+the eager PyTorch models. Requires `pip install optimum[onnxruntime]`.
+"""
+
+import os
+
+from transformers import AutoTokenizer, pipeline
+
+from .cache import CACHE_ROOT
+
+# Where exported ONNX graphs are cached between restarts
+ONNX_CACHE_DIR = os.getenv("PARAPHRASE_ONNX_CACHE_DIR", os.path.join(CACHE_ROOT, "onnx-cache"))
+
+
+def onnx_export_dir(model_id: str) -> str:
+    """Cache directory for one model's export"""
+    return os.path.join(ONNX_CACHE_DIR, model_id.replace("/", "--"))
+
+
+def load_onnx_pipe(model_id: str):
+    """Load (exporting on first use) an ONNX Runtime text2text pipeline"""
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise RuntimeError("The onnx engine needs `pip install optimum[onnxruntime]`") from e
+
+    export_dir = onnx_export_dir(model_id)
+    if os.path.exists(os.path.join(export_dir, "config.json")):
+        model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        # use_cache=True exports the decoder-with-past graph alongside the encoder
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_id, export=True, use_cache=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+
+    return pipeline("text2text-generation", model=model, tokenizer=tokenizer)
+
+
+def onnx_model_bytes(model) -> int:
+    """Approximate resident size of an ORT model from its graph and weight files"""
+    save_dir = str(getattr(model, "model_save_dir", "") or "")
+    if not os.path.isdir(save_dir):
+        return 0
+    total = 0
+    for name in os.listdir(save_dir):
+        if name.endswith((".onnx", ".onnx_data")):
+            total += os.path.getsize(os.path.join(save_dir, name))
+    return total
@@ -0,0 +1,198 @@
+"""
+Memory-budgeted model registry.
+Keeps loaded pipelines resident within a byte budget, never evicts
+pinned models and loads each model at most once at a time.
+"""
+
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+
+from .mmap_weights import load_mmap_model, mmap_enabled
+from .onnx_engine import load_onnx_pipe, onnx_model_bytes
+
+# Registry configuration
+MODEL_MEMORY_BUDGET_BYTES = int(float(os.getenv("PARAPHRASE_MODEL_BUDGET_MB", "3072")) * 1024 * 1024)
+
+# Inference engine: eager PyTorch or ONNX Runtime
+ENGINES = ("eager", "onnx")
+DEFAULT_ENGINE = os.getenv("PARAPHRASE_ENGINE", "eager")
+
+
+def registry_key(model_id: str, engine: str = DEFAULT_ENGINE) -> str:
+    """Registry key for a model served by a given engine"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    return model_id if engine == "eager" else f"{model_id}@{engine}"
+
+
+def load_pipe(key: str):
+    """Load a text2text pipeline with optimal device configuration"""
+    model_name, _, engine = key.partition("@")
+    if engine == "onnx":
+        return load_onnx_pipe(model_name)
+    if mmap_enabled():
+        # Share one page-cache copy of the weights across worker processes
+        return pipeline(
+            "text2text-generation",
+            model=load_mmap_model(AutoModelForSeq2SeqLM, model_name),
+            tokenizer=AutoTokenizer.from_pretrained(model_name),
+            device=-1
+        )
+
+    device = 0 if torch.cuda.is_available() else -1
+    return pipeline(
+        "text2text-generation",
+        model=model_name,
+        device=device,
+        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
+    )
+
+
+def model_memory_bytes(model) -> int:
+    """Parameter and buffer memory of a torch module"""
+    if not isinstance(model, torch.nn.Module):
+        return onnx_model_bytes(model)
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelEntry:
+    def __init__(self, model_id: str, pipe, size_bytes: int, load_seconds: float, pinned: bool):
+        self.model_id = model_id
+        self.pipe = pipe
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.pinned = pinned
+        self.last_used = time.time()
+
+
+class LoadState:
+    """Single-flight marker for a model that is being loaded"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.started_at = time.time()
+
+
+class ModelRegistry:
+    """LRU set of resident models bounded by parameter memory"""
+
+    def __init__(self, loader: Callable = load_pipe, budget_bytes: int = MODEL_MEMORY_BUDGET_BYTES,
+                 pinned: Iterable[str] = (), sizer: Callable = None):
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self.pinned = set(pinned)
+        self.sizer = sizer or (lambda pipe: model_memory_bytes(pipe.model))
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._loading: Dict[str, LoadState] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str):
+        """Return the resident pipeline, loading it if needed"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(model_id)
+                if entry:
+                    entry.last_used = time.time()
+                    self._entries.move_to_end(model_id)
+                    return entry.pipe
+                state = self._loading.get(model_id)
+                owner = state is None
+                if owner:
+                    state = LoadState()
+                    self._loading[model_id] = state
+
+            if owner:
+                return self._load(model_id, state)
+
+            # Another request is already loading this model; wait for it
+            state.done.wait()
+            if state.error is not None:
+                raise state.error
+
+    def _load(self, model_id: str, state: LoadState):
+        try:
+            started = time.perf_counter()
+            pipe = self.loader(model_id)
+            entry = ModelEntry(model_id, pipe, self.sizer(pipe), time.perf_counter() - started,
+                               model_id in self.pinned)
+        except BaseException as e:
+            with self._lock:
+                state.error = e
+                self._loading.pop(model_id, None)
+            state.done.set()
+            raise
+
+        with self._lock:
+            pinned_bytes = sum(e.size_bytes for e in self._entries.values() if e.pinned)
+            if not entry.pinned and pinned_bytes + entry.size_bytes > self.budget_bytes:
+                # Would not fit even with every unpinned model evicted: serve it once, keep nothing
+                print(f"Model {model_id} ({entry.size_bytes} bytes) exceeds the memory budget; not kept resident")
+            else:
+                self._entries[model_id] = entry
+                self._evict_over_budget(keep=model_id)
+            self._loading.pop(model_id, None)
+        state.done.set()
+        gc.collect()
+        return pipe
+
+    def _used_bytes(self) -> int:
+        return sum(e.size_bytes for e in self._entries.values())
+
+    def _evict_over_budget(self, keep: str):
+        """Drop least recently used unpinned models until within budget"""
+        for model_id in list(self._entries):
+            if self._used_bytes() <= self.budget_bytes:
+                break
+            entry = self._entries[model_id]
+            if entry.pinned or model_id == keep:
+                continue
+            self._entries.pop(model_id)
+
+    def evict(self, model_id: str) -> bool:
+        """Unload a model unless it is pinned"""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is None or entry.pinned:
+                return False
+            self._entries.pop(model_id)
+        gc.collect()
+        return True
+
+    def is_resident(self, model_id: str) -> bool:
+        with self._lock:
+            return model_id in self._entries
+
+    def is_loading(self, model_id: str) -> bool:
+        with self._lock:
+            return model_id in self._loading
+
+    def snapshot(self) -> Dict:
+        """Resident models and their memory use"""
+        with self._lock:
+            models: List[Dict] = [
+                {
+                    "model_id": e.model_id,
+                    "bytes": e.size_bytes,
+                    "pinned": e.pinned,
+                    "load_seconds": round(e.load_seconds, 3),
+                    "last_used": e.last_used,
+                }
+                for e in self._entries.values()
+            ]
+            return {
+                "budget_bytes": self.budget_bytes,
+                "used_bytes": self._used_bytes(),
+                "resident": models,
+                "loading": sorted(self._loading),
+            }
@@ -0,0 +1,91 @@
+"""
+Candidate reranking over hashed word n-grams.
+Every candidate becomes a binary vector of hashed 1-3 gram features, so
+overlap with the input and between candidates reduces to a couple of
+matrix products. Selection is greedy: the least input-copying
+candidate first, then whichever adds the most diversity.
+"""
+
+import os
+import re
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+# Feature space and n-gram orders
+HASH_DIM = 1 << 12
+NGRAM_ORDERS = (1, 2, 3)
+
+# Candidates this similar to an already selected one are dropped
+NEAR_DUPLICATE = float(os.getenv("PARAPHRASE_NEAR_DUPLICATE", "0.8"))
+# Weight of redundancy against originality in the greedy selection
+DIVERSITY_WEIGHT = float(os.getenv("PARAPHRASE_DIVERSITY_WEIGHT", "0.5"))
+
+_WORD = re.compile(r"\w+")
+
+
+def ngram_vectors(texts: List[str]) -> np.ndarray:
+    """Binary hashed n-gram presence matrix, one row per text"""
+    matrix = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        words = _WORD.findall(text.lower())
+        features = [
+            zlib.crc32(" ".join(words[i:i + n]).encode("utf-8")) % HASH_DIM
+            for n in NGRAM_ORDERS
+            for i in range(len(words) - n + 1)
+        ]
+        if features:
+            matrix[row, features] = 1.0
+    return matrix
+
+
+def overlap_scores(candidates: List[str], source: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (copy, similarity): the share of each candidate's n-grams
+    found in the source, and the pairwise Jaccard matrix between candidates
+    """
+    vectors = ngram_vectors(candidates + [source])
+    cand, src = vectors[:-1], vectors[-1]
+    sizes = np.maximum(cand.sum(axis=1), 1.0)
+
+    copy = (cand @ src) / sizes
+    shared = cand @ cand.T
+    union = sizes[:, None] + sizes[None, :] - shared
+    similarity = shared / np.maximum(union, 1.0)
+    return copy, similarity
+
+
+def rerank(candidates: List[str], source: str, k: int) -> Tuple[List[str], int]:
+    """
+    Pick up to k candidates that copy the source least and overlap each
+    other least. Returns (selected, near_duplicates_dropped).
+    """
+    if len(candidates) <= 1:
+        return candidates[:k], 0
+
+    copy, similarity = overlap_scores(candidates, source)
+    originality = 1.0 - copy
+
+    # Near copies of the source only survive when nothing else does
+    remaining = copy < NEAR_DUPLICATE
+    if not remaining.any():
+        remaining[:] = True
+    dropped = int(len(candidates) - remaining.sum())
+
+    selected: List[int] = [int(np.argmax(np.where(remaining, originality, -np.inf)))]
+    remaining[selected[0]] = False
+
+    while len(selected) < k and remaining.any():
+        redundancy = similarity[:, selected].max(axis=1)
+        near = remaining & (redundancy >= NEAR_DUPLICATE)
+        dropped += int(near.sum())
+        remaining &= ~near
+        if not remaining.any():
+            break
+        score = np.where(remaining, originality - DIVERSITY_WEIGHT * redundancy, -np.inf)
+        best = int(np.argmax(score))
+        selected.append(best)
+        remaining[best] = False
+
+    return [candidates[i] for i in selected], dropped
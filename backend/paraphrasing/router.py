@@ -1,16 +1,40 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import os
+from functools import partial
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict
-from .service import paraphrase
+from typing import Dict, List, Optional
+from . import metrics
+from .cancellation import REQUEST_TIMEOUT_SECONDS, CancelToken, RequestCancelled
+from .cache import CACHE_ENABLED, get_paraphrase_cache
+from .scheduler import MAX_BATCH_SIZE, QueueFullError, get_scheduler
+from .service import (LEVEL_PRESETS, model_catalog, model_registry, is_long_input, paraphrase_levels,
+                      paraphrase_long_text, paraphrase_stream, resolve_model_id)
+from .streaming import StreamLimiter, sse_stream
 
 router = APIRouter()
 
+# How often async endpoints check whether their client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Items one /batch request keeps queued or running at a time
+BATCH_MAX_INFLIGHT = int(os.getenv("PARAPHRASE_BATCH_MAX_INFLIGHT", str(2 * MAX_BATCH_SIZE)))
+# Queue slots /batch never fills, so interactive requests still get in
+BATCH_QUEUE_HEADROOM = int(os.getenv("PARAPHRASE_BATCH_QUEUE_HEADROOM", "16"))
+
+# /stream decodes outside the scheduler, so it has its own concurrency cap
+stream_limiter = StreamLimiter()
+
 class ParaphraseRequest(BaseModel):
     text: str = Field(..., min_length=3)
     model_name: str = Field("t5", description="t5 | bart | custom HF repo")
     level: str = Field("balanced", description="conservative | balanced | creative")
     num_return_sequences: int = Field(1)
     max_new_tokens: int = Field(50)
+    seed: Optional[int] = Field(None, description="Sampling seed; batch-mates can still change seeded samples, and the cache replays the first result")
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Deadline; generation stops once it passes")
 
 class ParaphraseResponse(BaseModel):
     paraphrases: list[str]
@@ -18,19 +42,111 @@ class ParaphraseResponse(BaseModel):
     level: str
     generation_params: dict
 
-@router.post("/generate", response_model=ParaphraseResponse)
-def paraphrase_endpoint(req: ParaphraseRequest):
-    if not req.text.strip():
-        raise HTTPException(status_code=400, detail="Empty text.")
+def queue_full(e: QueueFullError) -> HTTPException:
+    """429 with a Retry-After estimated from the current service rate"""
+    return HTTPException(
+        status_code=429,
+        detail="Paraphrasing is at capacity, please retry shortly.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def cancelled(e: RequestCancelled) -> HTTPException:
+    """504 when the deadline passed; 499 (client closed request) otherwise"""
+    if e.reason == "deadline":
+        return HTTPException(status_code=504, detail="Paraphrasing did not finish before the deadline.")
+    return HTTPException(status_code=499, detail="Client closed the request.")
+
+def cancel_token(timeout_seconds: Optional[float]) -> CancelToken:
+    return CancelToken(timeout_seconds or REQUEST_TIMEOUT_SECONDS)
+
+async def await_inference(request: Request, future, token: CancelToken):
+    """Await a scheduler future, cancelling its token if the client disconnects"""
+    async def watch():
+        while not token.cancelled():
+            if await request.is_disconnected():
+                token.cancel("disconnect")
+                return
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
 
+    watcher = asyncio.create_task(watch())
     try:
-        outputs, params = paraphrase(
+        return await asyncio.wrap_future(future)
+    finally:
+        watcher.cancel()
+
+def model_not_ready(model_name: str, request: Request) -> Optional[JSONResponse]:
+    """
+    None when the model can be served now. Otherwise start a background
+    load and return a 202 pointing at the model's status URL, so the
+    request never blocks on a download.
+    """
+    model_id = resolve_model_id(model_name)
+    if not model_catalog.is_allowed(model_id):
+        raise HTTPException(status_code=403, detail=f"Model {model_id} is not in the model catalog.")
+    if model_catalog.is_ready(model_id):
+        return None
+
+    status = model_catalog.prefetch(model_id)
+    if status["state"] == "ready":
+        return None
+    if status["state"] == "failed":
+        raise HTTPException(status_code=503, detail=f"Model {model_id} failed to load: {status['error']}")
+
+    status_url = str(request.url_for("model_status_endpoint").include_query_params(model_name=model_id))
+    return JSONResponse(
+        status_code=202,
+        content=dict(status, status_url=status_url),
+        headers={"Location": status_url, "Retry-After": "5"}
+    )
+
+def submit_paraphrase(req: ParaphraseRequest, token: Optional[CancelToken] = None):
+    """Queue one request on the inference executor; raises QueueFullError"""
+    scheduler = get_scheduler()
+    if is_long_input(req.text):
+        # Long documents are split into sentences and batched by the service itself
+        # The scheduler keeps its own reference to the token, the task gets one to stop decoding
+        return scheduler.submit_task(
+            partial(paraphrase_long_text, cancel=token),
+            cancel=token,
             text=req.text,
             level=req.level,
             num_return_sequences=req.num_return_sequences,
             max_new_tokens=req.max_new_tokens,
-            model_name=req.model_name
+            model_name=req.model_name,
+            seed=req.seed
         )
+    # Concurrent requests are micro-batched by the shared scheduler
+    return scheduler.submit(
+        text=req.text,
+        level=req.level,
+        num_return_sequences=req.num_return_sequences,
+        max_new_tokens=req.max_new_tokens,
+        model_name=req.model_name,
+        seed=req.seed,
+        cancel=token
+    )
+
+@router.post("/generate", response_model=ParaphraseResponse)
+async def paraphrase_endpoint(req: ParaphraseRequest, request: Request):
+    # Async so model work never occupies FastAPI's shared threadpool;
+    # it runs on the scheduler's bounded inference executor instead
+    if not req.text.strip():
+        raise HTTPException(status_code=400, detail="Empty text.")
+
+    loading = model_not_ready(req.model_name, request)
+    if loading is not None:
+        return loading
+
+    token = cancel_token(req.timeout_seconds)
+    try:
+        future = submit_paraphrase(req, token)
+    except QueueFullError as e:
+        raise queue_full(e)
+
+    try:
+        outputs, params = await await_inference(request, future, token)
+    except RequestCancelled as e:
+        raise cancelled(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -39,4 +155,211 @@ def paraphrase_endpoint(req: ParaphraseRequest):
         model_name=req.model_name,
         level=req.level,
         generation_params=params
-    )
\ No newline at end of file
+    )
+
+class BatchRequest(BaseModel):
+    items: List[ParaphraseRequest] = Field(..., min_length=1, max_length=1000)
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Deadline for the whole batch")
+
+async def batch_lines(items: List[ParaphraseRequest], token: CancelToken):
+    """
+    Submit items as queue capacity allows and yield one NDJSON line per
+    item in completion order. At most BATCH_MAX_INFLIGHT items are in
+    flight and BATCH_QUEUE_HEADROOM queue slots are left to interactive
+    requests; a busy queue only delays the remaining items until earlier
+    ones finish. All items share one token, so a client disconnect (the
+    response being closed) cancels whatever is left.
+    """
+    scheduler = get_scheduler()
+    queue_limit = scheduler.max_queue - min(BATCH_QUEUE_HEADROOM, scheduler.max_queue // 2)
+    pending: Dict[asyncio.Future, int] = {}
+    next_index = 0
+    try:
+        while next_index < len(items) or pending:
+            while next_index < len(items) and len(pending) < max(1, BATCH_MAX_INFLIGHT):
+                item = items[next_index]
+                if not item.text.strip() or token.cancelled():
+                    error = "Empty text." if not item.text.strip() else f"Request cancelled: {token.reason}"
+                    yield json.dumps({"index": next_index, "error": error}) + "\n"
+                    next_index += 1
+                    continue
+                try:
+                    depth = scheduler.queue_depth()
+                    if depth >= queue_limit:
+                        raise QueueFullError(scheduler.retry_after(depth))
+                    future = submit_paraphrase(item, token)
+                except QueueFullError as e:
+                    if not pending:
+                        # The queue is busy with other clients' work; back off briefly
+                        await asyncio.sleep(min(e.retry_after, 1))
+                    break
+                pending[asyncio.wrap_future(future)] = next_index
+                next_index += 1
+
+            if not pending:
+                continue
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                item = items[index]
+                try:
+                    outputs, params = future.result()
+                    line = {
+                        "index": index,
+                        "paraphrases": outputs,
+                        "model_name": item.model_name,
+                        "level": item.level,
+                        "generation_params": params,
+                    }
+                except Exception as e:
+                    line = {"index": index, "error": str(e)}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+    finally:
+        if pending or next_index < len(items):
+            token.cancel("disconnect")
+
+@router.post("/batch")
+async def paraphrase_batch_endpoint(req: BatchRequest, request: Request):
+    """
+    Paraphrase many items in one request. Items are micro-batched by the
+    scheduler and streamed back as NDJSON, one line per item with its
+    index, as soon as each finishes
+    """
+    for model_name in sorted({item.model_name for item in req.items}):
+        loading = model_not_ready(model_name, request)
+        if loading is not None:
+            return loading
+
+    scheduler = get_scheduler()
+    if scheduler.queue_depth() >= scheduler.max_queue:
+        raise queue_full(QueueFullError(scheduler.retry_after(scheduler.queue_depth())))
+
+    return StreamingResponse(
+        # Batches can legitimately run long, so they only get a deadline when asked for
+        batch_lines(req.items, CancelToken(req.timeout_seconds)),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+@router.post("/stream")
+def paraphrase_stream_endpoint(req: ParaphraseRequest, request: Request):
+    """Server-sent events: decoded text as it is produced, then a final "done" event"""
+    if not req.text.strip():
+        raise HTTPException(status_code=400, detail="Empty text.")
+
+    loading = model_not_ready(req.model_name, request)
+    if loading is not None:
+        return loading
+
+    if not stream_limiter.try_acquire():
+        raise queue_full(QueueFullError(1))
+
+    # Closing the response closes this generator, which cancels decoding
+    events = paraphrase_stream(
+        text=req.text,
+        level=req.level,
+        max_new_tokens=req.max_new_tokens,
+        model_name=req.model_name,
+        cancel=cancel_token(req.timeout_seconds)
+    )
+    return StreamingResponse(
+        sse_stream(stream_limiter.hold(events)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+class LevelsRequest(BaseModel):
+    text: str = Field(..., min_length=3)
+    model_name: str = Field("t5", description="t5 | bart | custom HF repo")
+    levels: List[str] = Field(default_factory=lambda: list(LEVEL_PRESETS))
+    num_return_sequences: int = Field(1)
+    max_new_tokens: int = Field(50)
+    seed: Optional[int] = Field(None)
+    timeout_seconds: Optional[float] = Field(None, gt=0)
+
+class LevelsResponse(BaseModel):
+    paraphrases: Dict[str, list[str]]
+    model_name: str
+    generation_params: Dict[str, dict]
+
+@router.post("/levels", response_model=LevelsResponse)
+async def paraphrase_levels_endpoint(req: LevelsRequest, request: Request):
+    """Every requested creativity level from a single encoder pass"""
+    if not req.text.strip():
+        raise HTTPException(status_code=400, detail="Empty text.")
+
+    unknown = [level for level in req.levels if level not in LEVEL_PRESETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown levels: {', '.join(unknown)}")
+
+    loading = model_not_ready(req.model_name, request)
+    if loading is not None:
+        return loading
+
+    token = cancel_token(req.timeout_seconds)
+    try:
+        future = get_scheduler().submit_task(
+            partial(paraphrase_levels, cancel=token),
+            cancel=token,
+            text=req.text,
+            levels=req.levels,
+            num_return_sequences=req.num_return_sequences,
+            max_new_tokens=req.max_new_tokens,
+            model_name=req.model_name,
+            seed=req.seed
+        )
+    except QueueFullError as e:
+        raise queue_full(e)
+
+    try:
+        results = await await_inference(request, future, token)
+    except RequestCancelled as e:
+        raise cancelled(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return LevelsResponse(
+        paraphrases={level: outputs for level, (outputs, _) in results.items()},
+        model_name=req.model_name,
+        generation_params={level: params for level, (_, params) in results.items()}
+    )
+
+@router.get("/models")
+def models_endpoint():
+    """Resident models, their memory use, the registry budget and the model catalog"""
+    return dict(model_registry.snapshot(), catalog=model_catalog.snapshot())
+
+class PrefetchRequest(BaseModel):
+    model_name: str = Field(..., description="Catalogued HF repo or local model directory")
+
+@router.post("/models/prefetch", status_code=202)
+def model_prefetch_endpoint(req: PrefetchRequest, request: Request):
+    """Load a catalogued model in the background (retrying a failed load)"""
+    model_id = resolve_model_id(req.model_name)
+    if not model_catalog.is_allowed(model_id):
+        raise HTTPException(status_code=403, detail=f"Model {model_id} is not in the model catalog.")
+    status = model_catalog.prefetch(model_id, retry_failed=True)
+    status_url = str(request.url_for("model_status_endpoint").include_query_params(model_name=model_id))
+    return dict(status, status_url=status_url)
+
+@router.get("/models/status", name="model_status_endpoint")
+def model_status_endpoint(model_name: str):
+    """Load state of one model: ready, loading, failed or not_loaded"""
+    model_id = resolve_model_id(model_name)
+    if not model_catalog.is_allowed(model_id):
+        raise HTTPException(status_code=403, detail=f"Model {model_id} is not in the model catalog.")
+    return model_catalog.status(model_id)
+
+@router.get("/metrics")
+def metrics_endpoint():
+    """Batch-size and queue-wait histograms plus service counters"""
+    snapshot = metrics.snapshot()
+    scheduler = get_scheduler()
+    snapshot["paraphrase_queue"] = {
+        "depth": scheduler.queue_depth(),
+        "max_queue": scheduler.max_queue,
+        "service_rate": scheduler.service_rate,
+    }
+    if CACHE_ENABLED:
+        snapshot["paraphrase_cache"] = get_paraphrase_cache().stats()
+    return snapshot
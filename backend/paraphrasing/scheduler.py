@@ -0,0 +1,239 @@
+"""
+Dynamic micro-batching scheduler for paraphrase requests.
+Concurrent requests are held for a short window, grouped by
+(model_id, level) and run through paraphrase_batch as one padded batch.
+The scheduler thread is the dedicated inference executor: its queue is
+bounded and full queues are rejected with a retry estimate. With
+PARAPHRASE_WORKER_PROCESSES set, batches are run by a process pool and
+one dispatch thread per worker keeps them all busy.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, List, Optional, Tuple
+
+from . import metrics
+from .cancellation import CancelToken, RequestCancelled, is_cancelled, record_cancel
+from .service import paraphrase_batch, resolve_model_id
+from .workers import WORKER_PROCESSES, get_worker_pool
+
+# Scheduler configuration
+MAX_BATCH_SIZE = int(os.getenv("PARAPHRASE_MAX_BATCH_SIZE", "8"))
+MAX_WAIT_MS = float(os.getenv("PARAPHRASE_MAX_WAIT_MS", "10"))
+MAX_QUEUE = int(os.getenv("PARAPHRASE_MAX_QUEUE", "64"))
+
+batch_size_histogram = metrics.histogram("paraphrase_batch_size", metrics.BATCH_SIZE_BUCKETS)
+queue_wait_histogram = metrics.histogram("paraphrase_queue_wait_ms", metrics.LATENCY_MS_BUCKETS)
+rejected_counter = metrics.counter("paraphrase_rejected")
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the inference queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PendingRequest:
+    """A queued paraphrase call waiting to join a batch"""
+
+    def __init__(self, text: str, level: str, num_return_sequences: int,
+                 max_new_tokens: int, model_name: str, seed: Optional[int] = None,
+                 task: Optional[Callable] = None, cancel: Optional[CancelToken] = None):
+        self.text = text
+        self.level = level
+        self.num_return_sequences = max(1, num_return_sequences)
+        self.max_new_tokens = max_new_tokens
+        self.model_name = model_name
+        self.seed = seed
+        self.cancel = cancel
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        # Requests only share a batch when their generation budget and seed
+        # match, so every caller keeps its own max_new_tokens and seeding contract
+        self.key = (resolve_model_id(model_name), level, max_new_tokens, seed)
+        # Standalone tasks (long documents, multi-level calls) run on their own
+        self.task = task
+        if task is not None:
+            self.key = ("task", id(self))
+
+
+class MicroBatchScheduler:
+    """Collects concurrent requests and dispatches them as batches"""
+
+    def __init__(self, runner: Callable = paraphrase_batch,
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS,
+                 max_queue: int = MAX_QUEUE, workers: int = 1):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue = max(1, max_queue)
+        # Exponentially weighted requests completed per second
+        self.service_rate: Optional[float] = None
+        self._pending: Deque[PendingRequest] = deque()
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"paraphrase-scheduler-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, text: str, level: str = "balanced", num_return_sequences: int = 1,
+               max_new_tokens: int = 50, model_name: str = "t5", seed: Optional[int] = None,
+               cancel: Optional[CancelToken] = None) -> Future:
+        """Queue a request; the future resolves to (paraphrases, params)"""
+        return self._enqueue(PendingRequest(text, level, num_return_sequences, max_new_tokens, model_name,
+                                            seed, cancel=cancel))
+
+    def submit_task(self, fn: Callable, *args, cancel: Optional[CancelToken] = None, **kwargs) -> Future:
+        """Queue a standalone call on the inference executor"""
+        task = lambda: fn(*args, **kwargs)
+        return self._enqueue(PendingRequest("", "", 1, 0, "", task=task, cancel=cancel))
+
+    def _enqueue(self, request: PendingRequest) -> Future:
+        with self._cond:
+            if len(self._pending) >= self.max_queue:
+                rejected_counter.inc()
+                raise QueueFullError(self.retry_after(len(self._pending)))
+            self._pending.append(request)
+            self._cond.notify()
+        return request.future
+
+    def retry_after(self, depth: int) -> int:
+        """Seconds until a new request would likely be served at the current rate"""
+        if not self.service_rate:
+            return 1
+        return max(1, min(60, math.ceil((depth + 1) / self.service_rate)))
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _record_rate(self, completed: int, seconds: float):
+        # Dispatch threads run in parallel, so each one sees a share of the throughput
+        rate = completed / max(seconds, 1e-6) * self.workers
+        self.service_rate = rate if self.service_rate is None else 0.8 * self.service_rate + 0.2 * rate
+
+    def _drop_cancelled(self):
+        """Resolve and remove queued requests nobody is waiting for any more"""
+        if not any(is_cancelled(r.cancel) for r in self._pending):
+            return
+        # A dropped request saves roughly one request's share of executor time
+        avoided = self.workers / self.service_rate if self.service_rate else 0.0
+        kept: Deque[PendingRequest] = deque()
+        for request in self._pending:
+            if is_cancelled(request.cancel):
+                record_cancel(request.cancel, "queued", avoided)
+                request.future.set_exception(RequestCancelled(request.cancel.reason))
+            else:
+                kept.append(request)
+        self._pending = kept
+
+    def _count_matching(self, key: Tuple) -> int:
+        return sum(1 for r in self._pending if r.key == key)
+
+    def _next_batch(self) -> List[PendingRequest]:
+        """Block until a batch is full or the oldest request's window closes"""
+        with self._cond:
+            while True:
+                while True:
+                    self._drop_cancelled()
+                    if self._pending:
+                        break
+                    self._cond.wait()
+
+                head = self._pending[0]
+                deadline = head.enqueued_at + self.max_wait
+                while self._count_matching(head.key) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch, rest = [], deque()
+                for request in self._pending:
+                    if request.key == head.key and len(batch) < self.max_batch_size:
+                        batch.append(request)
+                    else:
+                        rest.append(request)
+                self._pending = rest
+                # Another dispatch thread may have taken this head's batch while we waited
+                if batch:
+                    return batch
+
+    def _run(self):
+        while True:
+            batch: List[PendingRequest] = []
+            try:
+                batch = self._next_batch()
+                self._dispatch(batch)
+            except Exception as e:
+                # Nothing may kill a dispatch thread; whoever was waiting gets the error
+                print(f"Scheduler dispatch failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _dispatch(self, batch: List[PendingRequest]):
+        now = time.monotonic()
+        for request in batch:
+            queue_wait_histogram.observe((now - request.enqueued_at) * 1000.0)
+        batch_size_histogram.observe(len(batch))
+
+        head = batch[0]
+        started = time.perf_counter()
+        if head.task is not None:
+            try:
+                head.future.set_result(head.task())
+            except Exception as e:
+                head.future.set_exception(e)
+            self._record_rate(1, time.perf_counter() - started)
+            return
+
+        try:
+            results = self.runner(
+                [r.text for r in batch],
+                level=head.level,
+                num_return_sequences=max(r.num_return_sequences for r in batch),
+                max_new_tokens=head.max_new_tokens,
+                model_name=head.model_name,
+                seed=head.seed,
+                cancel_tokens=[r.cancel for r in batch],
+            )
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        self._record_rate(len(batch), time.perf_counter() - started)
+
+        # Each caller only gets back its own outputs
+        for request, (outputs, params) in zip(batch, results):
+            if is_cancelled(request.cancel):
+                request.future.set_exception(RequestCancelled(request.cancel.reason))
+                continue
+            own_params = dict(params, num_return_sequences=request.num_return_sequences)
+            request.future.set_result((outputs[:request.num_return_sequences], own_params))
+
+
+# Global instance
+scheduler: Optional[MicroBatchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> MicroBatchScheduler:
+    """Get or create the shared scheduler instance"""
+    global scheduler
+    with _scheduler_lock:
+        if scheduler is None:
+            if WORKER_PROCESSES > 0:
+                scheduler = MicroBatchScheduler(runner=get_worker_pool().run_batch, workers=WORKER_PROCESSES)
+            else:
+                scheduler = MicroBatchScheduler()
+        return scheduler
@@ -0,0 +1,31 @@
+"""
+Sentence and paragraph splitting shared by the paraphraser and the
+summarization chunker.
+"""
+
+import re
+from typing import List
+
+# Sentence boundary: terminal punctuation followed by whitespace and a new sentence
+SENTENCE_BOUNDARY = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+(?=["\'(\[]?[A-Z0-9])')
+ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "prof.", "st.", "jr.", "sr.", "vs.", "e.g.", "i.e.", "etc.", "no."}
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a paragraph into sentences without breaking after common abbreviations"""
+    sentences: List[str] = []
+    for piece in SENTENCE_BOUNDARY.split(" ".join(text.split())):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if sentences and sentences[-1].split()[-1].lower() in ABBREVIATIONS:
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+def split_paragraphs(text: str) -> List[List[str]]:
+    """Split text into paragraphs, each a list of sentences"""
+    paragraphs = [p for p in re.split(r'\n\s*\n', text) if p.strip()]
+    return [split_sentences(p) for p in paragraphs]
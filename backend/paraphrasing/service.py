@@ -1,11 +1,49 @@
-from functools import lru_cache
-from typing import List, Dict
-from transformers import pipeline
+import os
+import threading
+from contextlib import nullcontext
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+from transformers import LogitsProcessorList, StoppingCriteriaList, set_seed
+from transformers.modeling_outputs import BaseModelOutput
 import torch
 
+from . import metrics
+from .registry import DEFAULT_ENGINE, ModelRegistry, load_pipe, registry_key
+from .catalog import ModelCatalog
+from .cache import CACHE_ENABLED, get_paraphrase_cache, make_key
+from .streaming import iter_generated_text
+from .sentences import ABBREVIATIONS, split_paragraphs, split_sentences
+from .rerank import rerank
+from .stopping import SentenceEndProcessor, adaptive_budget, sentence_token_ids
+from .cancellation import AllCancelledCriteria, CancelToken, CancelledRowsProcessor, RequestCancelled, is_cancelled
+
 # Default T5 paraphraser
 DEFAULT_T5 = "ramsrigouthamg/t5_paraphraser"
 
+# Seed used for cached generations when the caller does not pass one
+DEFAULT_SEED = int(os.getenv("PARAPHRASE_DEFAULT_SEED", "0"))
+
+# Long-input mode: word threshold and sentences per padded batch
+LONG_INPUT_WORDS = int(os.getenv("PARAPHRASE_LONG_INPUT_WORDS", "60"))
+LONG_INPUT_BATCH_SIZE = int(os.getenv("PARAPHRASE_LONG_BATCH_SIZE", "16"))
+
+# Candidates sampled per requested paraphrase; the reranker keeps the best
+OVERGENERATE = max(1, int(os.getenv("PARAPHRASE_OVERGENERATE", "2")))
+
+# Decode-length controls: budget from input length, stop after the input's sentence count
+ADAPTIVE_BUDGET = os.getenv("PARAPHRASE_ADAPTIVE_BUDGET", "1") == "1"
+SENTENCE_STOP = os.getenv("PARAPHRASE_SENTENCE_STOP", "1") == "1"
+
+# Seeding touches the global torch RNG, so seeded generations run one at a time
+_seed_lock = threading.Lock()
+
+cache_hits = metrics.counter("paraphrase_cache_hits")
+cache_misses = metrics.counter("paraphrase_cache_misses")
+# Which tier produced the returned paraphrases: sampling, beam or simple_word_paraphrase
+fallback_tiers = metrics.counter("paraphrase_fallback_tier")
+near_duplicates = metrics.counter("paraphrase_near_duplicates_dropped")
+decode_steps = metrics.histogram("paraphrase_decode_steps", metrics.DECODE_STEP_BUCKETS)
+budget_trimmed = metrics.counter("paraphrase_budget_trimmed_tokens")
+
 # Presets for creativity levels
 LEVEL_PRESETS: Dict[str, Dict] = {
     "conservative": {"temperature": 0.5, "top_p": 0.7, "repetition_penalty": 1.3},
@@ -13,16 +51,21 @@ LEVEL_PRESETS: Dict[str, Dict] = {
     "creative": {"temperature": 1.2, "top_p": 0.95, "repetition_penalty": 1.0},
 }
 
-@lru_cache(maxsize=3)
-def get_pipe(model_name: str = DEFAULT_T5):
-    """Get pipeline with optimal device configuration"""
-    device = 0 if torch.cuda.is_available() else -1
-    return pipeline(
-        "text2text-generation", 
-        model=model_name,
-        device=device,
-        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
-    )
+# Short model names accepted by the API
+MODEL_ALIASES: Dict[str, str] = {
+    "t5": DEFAULT_T5,
+    "bart": "eugenesiow/bart-paraphrase",
+}
+
+# The default models are pinned and never evicted from the registry
+model_registry = ModelRegistry(load_pipe, pinned=[registry_key(m) for m in MODEL_ALIASES.values()])
+
+# Which models may be requested; non-default ones are prefetched in the background
+model_catalog = ModelCatalog(model_registry, inline_models=list(MODEL_ALIASES.values()))
+
+def get_pipe(model_name: str = DEFAULT_T5, engine: Optional[str] = None):
+    """Get pipeline from the memory-budgeted model registry"""
+    return model_registry.get(registry_key(model_name, engine or DEFAULT_ENGINE))
 
 def preprocess_text(text: str) -> str:
     """Clean and prepare text for paraphrasing"""
@@ -122,38 +165,12 @@ def postprocess_paraphrase(paraphrase: str, original_text: str) -> str:
     
     return paraphrase
 
-def paraphrase(
-    text: str,
-    level: str = "balanced",
-    num_return_sequences: int = 3,
-    max_new_tokens: int = 50,
-    model_name: str = "t5"
-):
-    """
-    Paraphrase text in three styles:
-    - conservative: professional/formal
-    - balanced: natural word changes
-    - creative: story-like / expressive
-    Ensures outputs are **sentences**, not questions.
-    """
-    # Map model
-    if model_name.lower() == "t5":
-        model_id = "ramsrigouthamg/t5_paraphraser"
-    elif model_name.lower() == "bart":
-        model_id = "eugenesiow/bart-paraphrase"
-    else:
-        model_id = model_name
-
-    pipe = get_pipe(model_id)
+def resolve_model_id(model_name: str) -> str:
+    """Map a short model name to its Hugging Face repo"""
+    return MODEL_ALIASES.get(model_name.lower(), model_name)
 
-    # Preprocess input text
-    clean_text = preprocess_text(text)
-    
-    # Improved prompt engineering for better paraphrasing
-    # The ramsrigouthamg/t5_paraphraser expects simple "paraphrase:" prefix
-    prompt = f"paraphrase: {clean_text}"
-
-    # Prepare generation parameters with improved settings
+def build_generation_params(level: str, num_return_sequences: int, max_new_tokens: int) -> Dict:
+    """Sampling parameters for a creativity level"""
     params = LEVEL_PRESETS.get(level, LEVEL_PRESETS["balanced"]).copy()
     
     # Enhance parameters for better quality with more diversity
@@ -190,49 +207,473 @@ def paraphrase(
             "no_repeat_ngram_size": 2,
             "clean_up_tokenization_spaces": True,
         })
+    return params
+
+def filter_candidates(paraphrases: List[str], text: str) -> List[str]:
+    """Postprocess raw generations and drop unusable ones"""
+    cleaned_paraphrases = []
+    for p in paraphrases:
+        # Apply postprocessing
+        cleaned_p = postprocess_paraphrase(p, text)
+        
+        # Skip if too similar to original or too short
+        if (cleaned_p.lower() != text.lower() and 
+            len(cleaned_p.split()) >= 3 and 
+            cleaned_p not in cleaned_paraphrases and
+            len(cleaned_p.strip()) > 0):
+            cleaned_paraphrases.append(cleaned_p)
+    return cleaned_paraphrases
+
+def overgenerate_params(params: Dict) -> Dict:
+    """Sample more candidates than requested so the reranker has a choice"""
+    return dict(params, num_return_sequences=params["num_return_sequences"] * OVERGENERATE)
+
+def select_candidates(raw: List[str], text: str, n: int, level: str) -> List[str]:
+    """Filter raw generations, then keep the n most diverse, least input-copying ones"""
+    selected, dropped = rerank(filter_candidates(raw, text), text, n)
+    near_duplicates.inc(level, dropped)
+    return selected
+
+def needs_fallback(cleaned_paraphrases: List[str], text: str) -> bool:
+    """True when no valid paraphrase or only questions were generated"""
+    return not cleaned_paraphrases or all(p.endswith('?') and not text.endswith('?') for p in cleaned_paraphrases)
+
+def beam_fallback_params(max_new_tokens: int) -> Dict:
+    """Deterministic beam search settings for the fallback pass"""
+    return {
+        "do_sample": False,
+        "num_beams": 5,
+        "max_new_tokens": max_new_tokens,
+        "repetition_penalty": 1.2,
+        "clean_up_tokenization_spaces": True,
+    }
+
+def accept_fallback(fallback: str, text: str, level: str) -> List[str]:
+    """Keep a beam fallback unless it copies the input or is a question"""
+    if fallback.lower() != text.lower() and not (fallback.endswith('?') and not text.endswith('?')):
+        fallback_tiers.inc("beam")
+        return [fallback]
+    # Last resort: use simple word replacement approach
+    fallback_tiers.inc("simple_word_paraphrase")
+    return [simple_word_paraphrase(text, level)]
+
+def _encode_prompts(pipe, prompts: List[str]):
+    """Tokenize prompts and run the encoder once"""
+    inputs = pipe.tokenizer(prompts, padding=True, truncation=True, return_tensors="pt").to(pipe.device)
+    with torch.no_grad():
+        encoder_outputs = pipe.model.get_encoder()(
+            input_ids=inputs.input_ids,
+            attention_mask=inputs.attention_mask,
+            return_dict=True,
+        )
+    return inputs.attention_mask, encoder_outputs.last_hidden_state
+
+def sentence_targets(texts: List[str]) -> List[int]:
+    """Sentences each output should stop after"""
+    return [len(split_sentences(t)) or 1 for t in texts]
+
+def _decode_kwargs(pipe, attention_mask, params: Dict, targets: Optional[List[int]] = None,
+                   cancel_tokens: Optional[List[Optional[CancelToken]]] = None) -> Dict:
+    """generate() kwargs with the adaptive budget, sentence-end stopping and cancellation applied"""
+    generate_kwargs = {k: v for k, v in params.items() if k != "clean_up_tokenization_spaces"}
+    if ADAPTIVE_BUDGET:
+        cap = generate_kwargs["max_new_tokens"]
+        generate_kwargs["max_new_tokens"] = adaptive_budget(int(attention_mask.sum(dim=1).max()), cap)
+        budget_trimmed.inc(amount=cap - generate_kwargs["max_new_tokens"])
+    processors = LogitsProcessorList()
+    eos_token_id = pipe.tokenizer.eos_token_id
+    if SENTENCE_STOP and targets and eos_token_id is not None:
+        end_ids, blocked_ids = sentence_token_ids(pipe.tokenizer, ABBREVIATIONS)
+        processors.append(SentenceEndProcessor(end_ids, blocked_ids, eos_token_id, targets))
+    if cancel_tokens and any(t is not None for t in cancel_tokens) and eos_token_id is not None:
+        # Cancelled rows end at once; a batch with nothing left to serve stops outright
+        processors.append(CancelledRowsProcessor(cancel_tokens, eos_token_id, generate_kwargs["max_new_tokens"]))
+        generate_kwargs["stopping_criteria"] = StoppingCriteriaList([AllCancelledCriteria(cancel_tokens)])
+    if processors:
+        generate_kwargs["logits_processor"] = processors
+    return generate_kwargs
+
+def _generate_from_encoded(pipe, attention_mask, hidden_states, params: Dict,
+                           targets: Optional[List[int]] = None,
+                           cancel_tokens: Optional[List[Optional[CancelToken]]] = None) -> List[List[str]]:
+    """Decode against precomputed encoder states, grouped per prompt"""
+    generate_kwargs = _decode_kwargs(pipe, attention_mask, params, targets, cancel_tokens)
+    with torch.no_grad():
+        # generate() expands encoder outputs in place, so each call gets a fresh wrapper
+        sequences = pipe.model.generate(
+            attention_mask=attention_mask,
+            encoder_outputs=BaseModelOutput(last_hidden_state=hidden_states),
+            **generate_kwargs,
+        )
+    decode_steps.observe(sequences.shape[1] - 1)
+    decoded = pipe.tokenizer.batch_decode(
+        sequences,
+        skip_special_tokens=True,
+        clean_up_tokenization_spaces=params.get("clean_up_tokenization_spaces", True),
+    )
+    n = generate_kwargs.get("num_return_sequences", 1)
+    return [[d.strip() for d in decoded[i:i + n]] for i in range(0, len(decoded), n)]
+
+def _generate_uncached(pipe, texts: List[str], prompts: List[str], level: str,
+                       params: Dict, max_new_tokens: int,
+                       cancel_tokens: Optional[List[Optional[CancelToken]]] = None) -> List[List[str]]:
+    """Run sampling plus the batched beam search fallback for a set of prompts"""
+    cancel_tokens = cancel_tokens or [None] * len(texts)
+    # Encode once; the beam fallback reuses the same encoder states
+    attention_mask, hidden_states = _encode_prompts(pipe, prompts)
+    targets = sentence_targets(texts)
+    outputs = _generate_from_encoded(pipe, attention_mask, hidden_states, overgenerate_params(params),
+                                     targets, cancel_tokens)
+    results = [select_candidates(o, t, params["num_return_sequences"], level) for o, t in zip(outputs, texts)]
+
+    # Batch every item that still needs the beam search fallback (and still has a client)
+    retry = [i for i, cleaned in enumerate(results)
+             if needs_fallback(cleaned, texts[i]) and not is_cancelled(cancel_tokens[i])]
+    fallback_tiers.inc("sampling", len(texts) - len(retry))
+    if retry:
+        index = torch.tensor(retry, device=hidden_states.device)
+        simple_outputs = _generate_from_encoded(
+            pipe,
+            attention_mask.index_select(0, index),
+            hidden_states.index_select(0, index),
+            beam_fallback_params(max_new_tokens),
+            [targets[i] for i in retry],
+            [cancel_tokens[i] for i in retry],
+        )
+        for i, output in zip(retry, simple_outputs):
+            fallback = postprocess_paraphrase(output[0], texts[i])
+            results[i] = accept_fallback(fallback, texts[i], level)
+
+    return [cleaned or [t] for cleaned, t in zip(results, texts)]
+
+def paraphrase_batch(
+    texts: List[str],
+    level: str = "balanced",
+    num_return_sequences: int = 3,
+    max_new_tokens: int = 50,
+    model_name: str = "t5",
+    seed: Optional[int] = None,
+    use_cache: Optional[bool] = None,
+    engine: Optional[str] = None,
+    cancel_tokens: Optional[List[Optional[CancelToken]]] = None,
+) -> List[Tuple[List[str], Dict]]:
+    """
+    Paraphrase several texts that share model and level in one padded
+    generate call. Returns one (paraphrases, params) pair per input,
+    in input order. With the cache enabled, sampling is seeded so a
+    repeat of the same batch samples the same way; a seeded row can
+    still differ when it shares a batch with other texts, which change
+    the random stream and the decode budget, so the cache keeps the
+    first result computed for a key. engine
+    overrides PARAPHRASE_ENGINE (eager | onnx) for this call.
+    cancel_tokens (one per text) stop decoding for requests whose
+    client left or whose deadline passed.
+    """
+    cancel_tokens = cancel_tokens or [None] * len(texts)
+    model_id = resolve_model_id(model_name)
+    params = build_generation_params(level, num_return_sequences, max_new_tokens)
+    cache = get_paraphrase_cache() if (CACHE_ENABLED if use_cache is None else use_cache) else None
+    if cache is not None and seed is None:
+        seed = DEFAULT_SEED
+    returned_params = dict(params, seed=seed) if seed is not None else params
+
+    # Preprocess input texts
+    # The ramsrigouthamg/t5_paraphraser expects simple "paraphrase:" prefix
+    clean_texts = [preprocess_text(t) for t in texts]
+    prompts = [f"paraphrase: {c}" for c in clean_texts]
+
+    results: List[Optional[List[str]]] = [None] * len(texts)
+    keys: List[str] = []
+    if cache is not None:
+        keys = [make_key(c, model_id, level, params["num_return_sequences"], max_new_tokens, seed,
+                         engine or DEFAULT_ENGINE, OVERGENERATE)
+                for c in clean_texts]
+        for i, key in enumerate(keys):
+            results[i] = cache.get(key)
+            (cache_hits if results[i] is not None else cache_misses).inc(level)
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    if not missing or all(is_cancelled(cancel_tokens[i]) for i in missing):
+        return [(r if r is not None else [t], returned_params) for r, t in zip(results, texts)]
 
     try:
-        # Generate paraphrases
-        outputs = pipe(prompt, **params)
-        paraphrases = [o["generated_text"].strip() for o in outputs]
-
-        # Clean and filter outputs
-        cleaned_paraphrases = []
-        for p in paraphrases:
-            # Apply postprocessing
-            cleaned_p = postprocess_paraphrase(p, text)
-            
-            # Skip if too similar to original or too short
-            if (cleaned_p.lower() != text.lower() and 
-                len(cleaned_p.split()) >= 3 and 
-                cleaned_p not in cleaned_paraphrases and
-                len(cleaned_p.strip()) > 0):
-                cleaned_paraphrases.append(cleaned_p)
-
-        # If no valid paraphrase or only questions generated, try different approaches
-        if not cleaned_paraphrases or all(p.endswith('?') and not text.endswith('?') for p in cleaned_paraphrases):
-            # Try with beam search for more reliable results
-            simple_params = {
-                "do_sample": False,
-                "num_beams": 5,
-                "max_new_tokens": max_new_tokens,
-                "repetition_penalty": 1.2,
-                "clean_up_tokenization_spaces": True,
-            }
-            simple_outputs = pipe(f"paraphrase: {clean_text}", **simple_params)
-            fallback = simple_outputs[0]["generated_text"].strip()
-            fallback = postprocess_paraphrase(fallback, text)
-            
-            if fallback.lower() != text.lower() and not (fallback.endswith('?') and not text.endswith('?')):
-                cleaned_paraphrases = [fallback]
-            else:
-                # Last resort: use simple word replacement approach
-                fallback = simple_word_paraphrase(text, level)
-                cleaned_paraphrases = [fallback]
+        pipe = get_pipe(model_id, engine)
+        with _seed_lock if seed is not None else nullcontext():
+            if seed is not None:
+                set_seed(seed)
+            generated = _generate_uncached(
+                pipe,
+                [texts[i] for i in missing],
+                [prompts[i] for i in missing],
+                level, params, max_new_tokens,
+                [cancel_tokens[i] for i in missing],
+            )
+        for i, outputs in zip(missing, generated):
+            results[i] = outputs
+            # Cut-short generations are never cached
+            if cache is not None and not is_cancelled(cancel_tokens[i]):
+                cache.set(keys[i], outputs)
 
-        return cleaned_paraphrases or [text], params
+        return [(r, returned_params) for r in results]
         
     except Exception as e:
         # Fallback in case of any error
         print(f"Error in paraphrasing: {e}")
-        return [text], params
+        return [(r if r is not None else [t], returned_params) for r, t in zip(results, texts)]
+
+def paraphrase_levels(
+    text: str,
+    levels: Optional[List[str]] = None,
+    num_return_sequences: int = 1,
+    max_new_tokens: Union[int, Dict[str, int]] = 50,
+    model_name: str = "t5",
+    seed: Optional[int] = None,
+    use_cache: Optional[bool] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, Tuple[List[str], Dict]]:
+    """
+    Paraphrase one text at several creativity levels. The prompt is
+    encoded once and every level's decoder runs against the shared
+    encoder states. max_new_tokens may be a per-level dict.
+    Returns {level: (paraphrases, params)}; raises RequestCancelled
+    once cancel fires.
+    """
+    levels = levels or list(LEVEL_PRESETS)
+    budgets = {level: max_new_tokens[level] if isinstance(max_new_tokens, dict) else max_new_tokens
+               for level in levels}
+
+    # Long documents go through the sentence-batched path level by level
+    if is_long_input(text):
+        return {
+            level: paraphrase_long_text(text, level=level, num_return_sequences=num_return_sequences,
+                                        max_new_tokens=budgets[level], model_name=model_name,
+                                        seed=seed, use_cache=use_cache, cancel=cancel)
+            for level in levels
+        }
+
+    model_id = resolve_model_id(model_name)
+    cache = get_paraphrase_cache() if (CACHE_ENABLED if use_cache is None else use_cache) else None
+    if cache is not None and seed is None:
+        seed = DEFAULT_SEED
+
+    clean_text = preprocess_text(text)
+    prompt = f"paraphrase: {clean_text}"
+
+    level_params = {level: build_generation_params(level, num_return_sequences, budgets[level])
+                    for level in levels}
+    returned_params = {level: dict(p, seed=seed) if seed is not None else p
+                       for level, p in level_params.items()}
+
+    results: Dict[str, List[str]] = {}
+    keys: Dict[str, str] = {}
+    if cache is not None:
+        for level in levels:
+            keys[level] = make_key(clean_text, model_id, level, level_params[level]["num_return_sequences"],
+                                   budgets[level], seed, DEFAULT_ENGINE, OVERGENERATE)
+            cached = cache.get(keys[level])
+            (cache_hits if cached is not None else cache_misses).inc(level)
+            if cached is not None:
+                results[level] = cached
+
+    missing = [level for level in levels if level not in results]
+    if missing:
+        try:
+            pipe = get_pipe(model_id)
+            with _seed_lock if seed is not None else nullcontext():
+                attention_mask, hidden_states = _encode_prompts(pipe, [prompt])
+                targets = sentence_targets([text])
+                beam_fallback: Dict[int, List[str]] = {}
+                for level in missing:
+                    if is_cancelled(cancel):
+                        break
+                    # Reseeding per level keeps a level's samples independent of which other levels were cached
+                    if seed is not None:
+                        set_seed(seed)
+                    raw = _generate_from_encoded(pipe, attention_mask, hidden_states,
+                                                 overgenerate_params(level_params[level]), targets, [cancel])[0]
+                    cleaned = select_candidates(raw, text, level_params[level]["num_return_sequences"], level)
+                    if not needs_fallback(cleaned, text):
+                        fallback_tiers.inc("sampling")
+                    else:
+                        # Beam search is deterministic, so one pass serves every level with the same budget
+                        budget = budgets[level]
+                        if budget not in beam_fallback:
+                            beam_fallback[budget] = _generate_from_encoded(
+                                pipe, attention_mask, hidden_states, beam_fallback_params(budget), targets, [cancel])[0]
+                        fallback = postprocess_paraphrase(beam_fallback[budget][0], text)
+                        cleaned = accept_fallback(fallback, text, level)
+                    results[level] = cleaned or [text]
+                    # Cut-short generations are never cached
+                    if cache is not None and not is_cancelled(cancel):
+                        cache.set(keys[level], results[level])
+        except Exception as e:
+            # Fallback in case of any error
+            print(f"Error in paraphrasing: {e}")
+            for level in missing:
+                results.setdefault(level, [text])
+        if is_cancelled(cancel):
+            raise RequestCancelled(cancel.reason)
+
+    return {level: (results[level], returned_params[level]) for level in levels}
+
+def paraphrase_stream(
+    text: str,
+    level: str = "balanced",
+    max_new_tokens: int = 50,
+    model_name: str = "t5",
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[Dict]:
+    """
+    Stream one paraphrase as it is decoded. Yields {"token": str} events
+    and finishes with {"done": True, "paraphrases": [...], "generation_params": {...}}
+    once postprocessing and any fallback have run. Closing the iterator
+    early (the client went away) stops the background generate().
+    """
+    cancel = cancel or CancelToken()
+    pipe = get_pipe(resolve_model_id(model_name))
+    params = build_generation_params(level, 1, max_new_tokens)
+    prompt = f"paraphrase: {preprocess_text(text)}"
+    attention_mask, hidden_states = _encode_prompts(pipe, [prompt])
+    targets = sentence_targets([text])
+
+    generate_kwargs = _decode_kwargs(pipe, attention_mask, params, targets, [cancel])
+    pieces = []
+    try:
+        for piece in iter_generated_text(
+            pipe.tokenizer,
+            pipe.model.generate,
+            attention_mask=attention_mask,
+            encoder_outputs=BaseModelOutput(last_hidden_state=hidden_states),
+            **generate_kwargs,
+        ):
+            pieces.append(piece)
+            yield {"token": piece}
+    except GeneratorExit:
+        cancel.cancel("disconnect")
+        raise
+    if cancel.cancelled():
+        raise RequestCancelled(cancel.reason)
+
+    # Final postprocessing runs on the complete text
+    cleaned = filter_candidates(["".join(pieces).strip()], text)
+    if needs_fallback(cleaned, text):
+        beam = _generate_from_encoded(pipe, attention_mask, hidden_states,
+                                      beam_fallback_params(max_new_tokens), targets)[0]
+        cleaned = accept_fallback(postprocess_paraphrase(beam[0], text), text, level)
+    else:
+        fallback_tiers.inc("sampling")
+
+    yield {"done": True, "paraphrases": cleaned or [text], "generation_params": params}
+
+def is_long_input(text: str) -> bool:
+    """Inputs above the word threshold are paraphrased sentence by sentence"""
+    return len(text.split()) > LONG_INPUT_WORDS
+
+def paraphrase_long_text(
+    text: str,
+    level: str = "balanced",
+    num_return_sequences: int = 1,
+    max_new_tokens: int = 50,
+    model_name: str = "t5",
+    batch_size: int = LONG_INPUT_BATCH_SIZE,
+    seed: Optional[int] = None,
+    use_cache: Optional[bool] = None,
+    engine: Optional[str] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Tuple[List[str], Dict]:
+    """
+    Paraphrase a multi-sentence document as padded sentence batches and
+    reassemble the results in order, keeping paragraph breaks. Every
+    sentence is postprocessed on its own. Raises RequestCancelled once
+    cancel fires; later batches are never started.
+    """
+    paragraphs = split_paragraphs(text)
+    sentences = [s for paragraph in paragraphs for s in paragraph]
+    if not sentences:
+        return [text], build_generation_params(level, num_return_sequences, max_new_tokens)
+
+    # Sort by length so each padded batch wastes as little as possible
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+    outputs: List[List[str]] = [[] for _ in sentences]
+    params: Dict = {}
+    for start in range(0, len(order), max(1, batch_size)):
+        if is_cancelled(cancel):
+            raise RequestCancelled(cancel.reason)
+        chunk = order[start:start + batch_size]
+        results = paraphrase_batch(
+            [sentences[i] for i in chunk],
+            level=level,
+            num_return_sequences=num_return_sequences,
+            max_new_tokens=max_new_tokens,
+            model_name=model_name,
+            seed=seed,
+            use_cache=use_cache,
+            engine=engine,
+            cancel_tokens=[cancel] * len(chunk),
+        )
+        for i, (paraphrases, params) in zip(chunk, results):
+            outputs[i] = paraphrases
+    if is_cancelled(cancel):
+        raise RequestCancelled(cancel.reason)
+
+    # Variant k takes the k-th candidate of every sentence where one exists
+    variants = []
+    for k in range(max(1, num_return_sequences)):
+        position = 0
+        rebuilt = []
+        for paragraph in paragraphs:
+            parts = []
+            for _ in paragraph:
+                candidates = outputs[position]
+                parts.append(candidates[k] if k < len(candidates) else candidates[0])
+                position += 1
+            rebuilt.append(" ".join(parts))
+        variant = "\n\n".join(rebuilt)
+        if variant not in variants:
+            variants.append(variant)
+
+    return variants, dict(params, long_input=True, sentences=len(sentences), batch_size=batch_size)
+
+def paraphrase(
+    text: str,
+    level: str = "balanced",
+    num_return_sequences: int = 3,
+    max_new_tokens: int = 50,
+    model_name: str = "t5",
+    seed: Optional[int] = None,
+    use_cache: Optional[bool] = None,
+    long_input: Optional[bool] = None,
+    engine: Optional[str] = None,
+):
+    """
+    Paraphrase text in three styles:
+    - conservative: professional/formal
+    - balanced: natural word changes
+    - creative: story-like / expressive
+    Ensures outputs are **sentences**, not questions.
+    Long inputs are split into sentences and paraphrased as batches.
+    """
+    if long_input is None:
+        long_input = is_long_input(text)
+    if long_input:
+        return paraphrase_long_text(
+            text,
+            level=level,
+            num_return_sequences=num_return_sequences,
+            max_new_tokens=max_new_tokens,
+            model_name=model_name,
+            seed=seed,
+            use_cache=use_cache,
+            engine=engine,
+        )
+
+    return paraphrase_batch(
+        [text],
+        level=level,
+        num_return_sequences=num_return_sequences,
+        max_new_tokens=max_new_tokens,
+        model_name=model_name,
+        seed=seed,
+        use_cache=use_cache,
+        engine=engine,
+    )[0]
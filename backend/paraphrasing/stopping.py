@@ -0,0 +1,84 @@
+"""
+Decode-length controls for the seq2seq generators.
+An adaptive token budget derived from the input length, and a logits
+processor that ends each sequence once it has produced as many complete
+sentences as its input had.
+"""
+
+import math
+import os
+import threading
+from typing import Dict, List, Tuple
+
+import torch
+from transformers import LogitsProcessor
+
+# Budget = input tokens * ratio + slack, capped by the caller's max_new_tokens
+BUDGET_RATIO = float(os.getenv("PARAPHRASE_BUDGET_RATIO", "1.5"))
+BUDGET_SLACK = int(os.getenv("PARAPHRASE_BUDGET_SLACK", "8"))
+
+# Sub-word markers used by sentencepiece and byte-level BPE vocabularies
+_WORD_MARKERS = "▁Ġ"
+_SENTENCE_END = (".", "!", "?")
+
+_vocab_cache: Dict[str, Tuple[torch.Tensor, torch.Tensor]] = {}
+_vocab_lock = threading.Lock()
+
+
+def adaptive_budget(input_tokens: int, max_new_tokens: int) -> int:
+    """New-token budget proportional to the longest input, never above the caller's cap"""
+    return max(1, min(max_new_tokens, math.ceil(input_tokens * BUDGET_RATIO) + BUDGET_SLACK))
+
+
+def sentence_token_ids(tokenizer, abbreviations=()) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    (end_ids, blocked_ids): tokens that end in sentence punctuation, and
+    tokens after which a following period does not end a sentence
+    (numbers and known abbreviations)
+    """
+    key = getattr(tokenizer, "name_or_path", "") or str(id(tokenizer))
+    with _vocab_lock:
+        if key not in _vocab_cache:
+            end_ids: List[int] = []
+            blocked_ids: List[int] = []
+            tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+            for token_id, token in enumerate(tokens):
+                piece = (token or "").lstrip(_WORD_MARKERS)
+                if not piece:
+                    continue
+                if piece.endswith(_SENTENCE_END):
+                    end_ids.append(token_id)
+                if piece[-1].isdigit() or f"{piece.lower()}." in abbreviations:
+                    blocked_ids.append(token_id)
+            _vocab_cache[key] = (torch.tensor(end_ids, dtype=torch.long),
+                                 torch.tensor(blocked_ids, dtype=torch.long))
+        return _vocab_cache[key]
+
+
+class SentenceEndProcessor(LogitsProcessor):
+    """
+    Forces EOS on every row that has produced its target number of
+    sentences. Works per row, which a transformers StoppingCriteria
+    (one flag for the whole batch) cannot do.
+    """
+
+    def __init__(self, end_ids: torch.Tensor, blocked_ids: torch.Tensor, eos_token_id: int,
+                 targets: List[int]):
+        self.end_ids = end_ids
+        self.blocked_ids = blocked_ids
+        self.eos_token_id = eos_token_id
+        self.targets = torch.tensor([max(1, t) for t in targets], dtype=torch.long)
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if input_ids.shape[1] < 2:
+            return scores
+        device = input_ids.device
+        tokens, previous = input_ids[:, 1:], input_ids[:, :-1]
+        ends = torch.isin(tokens, self.end_ids.to(device)) & ~torch.isin(previous, self.blocked_ids.to(device))
+        # Rows are prompts expanded by num_return_sequences or num_beams
+        targets = self.targets.to(device).repeat_interleave(input_ids.shape[0] // self.targets.shape[0])
+        done = ends.sum(dim=1) >= targets
+        if done.any():
+            scores[done] = -float("inf")
+            scores[done, self.eos_token_id] = 0.0
+        return scores
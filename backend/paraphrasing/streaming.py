@@ -0,0 +1,89 @@
+"""
+Token streaming helpers shared by the paraphrase and summary routes.
+Generation runs on a background thread and decoded text is handed
+back incrementally through a TextIteratorStreamer.
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterator, Optional
+
+from transformers import TextIteratorStreamer
+
+# Streams decode on their own threads rather than the scheduler's executor,
+# so each route caps how many may run at once
+MAX_STREAMS = int(os.getenv("MAX_CONCURRENT_STREAMS", "4"))
+
+
+def iter_generated_text(tokenizer, generate: Callable, **generate_kwargs) -> Iterator[str]:
+    """Run generate(streamer=..., **kwargs) in a thread and yield text as it is decoded"""
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+
+    def run():
+        try:
+            generate(streamer=streamer, **generate_kwargs)
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer if generate() failed before finishing the stream
+            streamer.end()
+
+    thread = threading.Thread(target=run, name="generate-stream", daemon=True)
+    thread.start()
+    for text in streamer:
+        if text:
+            yield text
+    thread.join()
+    if errors:
+        raise errors[0]
+
+
+class StreamLimiter:
+    """Bounded count of concurrent streams; a full limiter refuses instead of waiting"""
+
+    def __init__(self, limit: int = MAX_STREAMS):
+        self.limit = max(1, limit)
+        self._slots = threading.BoundedSemaphore(self.limit)
+
+    def try_acquire(self) -> bool:
+        return self._slots.acquire(blocking=False)
+
+    def hold(self, events: Iterator) -> Iterator:
+        """Yield from events, giving the slot back when the stream ends, is closed or is dropped"""
+        def run():
+            try:
+                yield None
+                yield from events
+            finally:
+                self._slots.release()
+
+        # Started here, so the slot is released even if the response never iterates the stream
+        stream = run()
+        next(stream)
+        return stream
+
+
+def format_sse(data: Dict, event: Optional[str] = None) -> str:
+    """Encode one server-sent event"""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_stream(events: Iterator[Dict]) -> Iterator[str]:
+    """
+    Turn service events into SSE frames. {"token": ...} events become
+    unnamed messages, {"done": True, ...} becomes a final "done" event
+    and any exception is reported as an "error" event.
+    """
+    try:
+        for item in events:
+            if item.get("done"):
+                yield format_sse({k: v for k, v in item.items() if k != "done"}, event="done")
+            else:
+                yield format_sse(item)
+    except Exception as e:
+        yield format_sse({"detail": str(e)}, event="error")
@@ -0,0 +1,94 @@
+"""
+Process-pool inference workers.
+Each worker is a separate interpreter with its own GIL and torch
+thread pool. Weights are memory-mapped (see mmap_weights), so the
+workers share one physical copy of every model instead of N.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+# Number of worker processes; 0 keeps inference on the scheduler thread
+WORKER_PROCESSES = int(os.getenv("PARAPHRASE_WORKER_PROCESSES", "0"))
+
+
+def _init_worker(processes: int):
+    """Split the CPU cores between workers so they do not oversubscribe"""
+    import torch
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // processes))
+
+
+def _run_batch(texts: List[str], kwargs: dict) -> List[Tuple[List[str], dict]]:
+    from .service import paraphrase_batch
+    return paraphrase_batch(texts, **kwargs)
+
+
+def _warm(model_name: str):
+    from .service import get_pipe, resolve_model_id
+    get_pipe(resolve_model_id(model_name))
+
+
+class InferenceWorkerPool:
+    """Runs paraphrase_batch in worker processes"""
+
+    def __init__(self, processes: int = WORKER_PROCESSES):
+        self.processes = max(1, processes)
+        # Models every worker has loaded
+        self.warmed = set()
+        # Children read this at import time, before any model is loaded
+        os.environ["TEXTMORPH_MMAP_WEIGHTS"] = "1"
+        # fork is unsafe once torch has started its own threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.processes,),
+        )
+
+    def run_batch(self, texts: List[str], **kwargs) -> List[Tuple[List[str], dict]]:
+        """Same contract as paraphrase_batch, executed in a worker"""
+        return self._executor.submit(_run_batch, texts, kwargs).result()
+
+    def warmup(self, model_name: str = "t5"):
+        """
+        Export the mapped weights from one worker before the others start
+        loading, then have every worker map them
+        """
+        self._executor.submit(_warm, model_name).result()
+        for future in [self._executor.submit(_warm, model_name) for _ in range(self.processes)]:
+            future.result()
+        self.warmed.add(model_name)
+
+    def warmup_in_background(self, model_name: str = "t5") -> threading.Thread:
+        """warmup() on its own thread, so no caller (or event loop) waits for the workers to load"""
+        def run():
+            try:
+                self.warmup(model_name)
+            except Exception as e:
+                print(f"Worker pool warmup of {model_name} failed: {e}")
+
+        thread = threading.Thread(target=run, name="worker-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Global instance
+worker_pool: Optional[InferenceWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> InferenceWorkerPool:
+    """Get or create the shared worker pool"""
+    global worker_pool
+    with _pool_lock:
+        if worker_pool is None:
+            worker_pool = InferenceWorkerPool()
+            # One worker exports the default model's weights before the rest map them
+            worker_pool.warmup_in_background()
+        return worker_pool
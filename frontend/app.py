@@ -8,6 +8,7 @@ sys.path.append(backend_dir)
 
 import sys
 import os
+import json
 from io import StringIO
 import streamlit as st
 import httpx
@@ -39,7 +40,6 @@ def lazy_import_rouge_scorer():
 
 
 # Paths for backend imports
-from backend.api.summarization import generate_summary, summarize_long_text
 # Import the better paraphrasing functions
 from backend.paraphrasing.service import paraphrase
 # Import reference models for comparison
@@ -293,17 +293,145 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def raise_for_backend_status(response, action="The request"):
+    """
+    Raise RuntimeError with a message for the user when the backend is
+    busy (429), still loading the model (202), timed out (504) or failed
+    """
+    status = response.status_code
+    if status < 400 and status != 202:
+        return
+    retry_after = response.headers.get("Retry-After", "a few")
+    if status == 202:
+        raise RuntimeError(f"The model is still loading, please try again in {retry_after} seconds.")
+    if status == 429:
+        raise RuntimeError(f"{action} is at capacity, please try again in {retry_after} seconds.")
+    if status == 504:
+        raise RuntimeError(f"{action} timed out. Try a shorter text.")
+    response.read()
+    try:
+        detail = response.json().get("detail", "Unknown error")
+    except ValueError:
+        detail = f"HTTP {status} error"
+    raise RuntimeError(detail)
+
+def stream_from_backend(path, payload, result, action="The request"):
+    """Yield text pieces from a backend SSE endpoint; the final "done" event is stored in result"""
+    with httpx.stream("POST", f"{API_URL}{path}", json=payload, timeout=None) as response:
+        raise_for_backend_status(response, action)
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):].strip())
+                if event == "done":
+                    result.update(data)
+                elif event == "error":
+                    raise RuntimeError(data.get("detail", "Streaming failed"))
+                else:
+                    yield data.get("token", "")
+            elif not line.strip():
+                event = None
+
+def request_summaries(text, lengths=("short", "medium", "long"), mode="auto"):
+    """
+    Summaries from the backend /summarize service, which holds the model
+    and batches requests across users. Falls back to summarizing in this
+    process only when the backend is unreachable; errors the backend
+    returns (busy, timed out) are raised with a message for the user.
+    """
+    try:
+        response = httpx.post(f"{API_URL}/summarize/generate", json={
+            "text": text,
+            "lengths": list(lengths),
+            "mode": mode,
+            "timeout_seconds": 290  # Long documents take a while; the backend gives up before we do
+        }, timeout=300)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        if status == 429:
+            retry_after = e.response.headers.get("Retry-After", "a few")
+            raise RuntimeError(f"The summarizer is busy, please try again in {retry_after} seconds.")
+        if status == 504:
+            raise RuntimeError("Summarization timed out. Try fast mode or a shorter text.")
+        try:
+            detail = e.response.json().get("detail", "Unknown error")
+        except ValueError:
+            detail = f"HTTP {status} error"
+        raise RuntimeError(detail)
+    except (httpx.ConnectError, httpx.ConnectTimeout):
+        pass
+    # Imported here so the summarization model only loads in this process when needed
+    from backend.api.summary_routing import get_summary_router
+    return get_summary_router().summarize(text, list(lengths), fast=mode == "fast")
+
+def summarize_for_button(text, length, fast=False, stream=False):
+    """
+    The summary for one length button. Streamed into the page from
+    /summarize/stream when asked for; otherwise, and whenever the backend is
+    unreachable, all lengths come from request_summaries in one batch.
+    """
+    if stream and not fast:
+        final = {}
+        try:
+            with st.empty():
+                st.write_stream(stream_from_backend("/summarize/stream", {"text": text, "length": length}, final,
+                                                    action="Summarization"))
+            return {"summaries": {length: final.get("summary", "")}, "tier": "pegasus-large (streamed)"}
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            pass
+    return request_summaries(text, mode="fast" if fast else "auto")
+
+def summarizer_status():
+    """Model readiness reported by the backend, or None if it is unreachable"""
+    try:
+        response = httpx.get(f"{API_URL}/summarize/status", timeout=5)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError:
+        return None
+
+def request_paraphrases(text, level, model_name="t5", max_new_tokens=100, num_options=1):
+    """
+    Paraphrases from the backend /paraphrasing service. A single option is
+    streamed into the page as it decodes. Falls back to paraphrasing in
+    this process only when the backend is unreachable; busy, loading and
+    timeout responses are raised with a message for the user.
+    """
+    payload = {
+        "text": text,
+        "level": level,
+        "num_return_sequences": max(1, num_options),
+        "max_new_tokens": max_new_tokens,
+        "model_name": model_name
+    }
+    try:
+        if num_options == 1:
+            final = {}
+            with st.empty():
+                st.write_stream(stream_from_backend("/paraphrasing/stream", payload, final, action="Paraphrasing"))
+            return final.get("paraphrases")
+        response = httpx.post(f"{API_URL}/paraphrasing/generate", json=payload, timeout=300)
+        raise_for_backend_status(response, action="Paraphrasing")
+        return response.json()["paraphrases"]
+    except (httpx.ConnectError, httpx.ConnectTimeout):
+        pass
+    paraphrases, _ = paraphrase(
+        text=text,
+        level=level,
+        num_return_sequences=max(1, num_options),
+        max_new_tokens=max_new_tokens,
+        model_name=model_name
+    )
+    return paraphrases
+
 def generate_improved_paraphrase(text, level, model_name="t5", max_new_tokens=100, num_options=1):
     """Generate paraphrase using the improved T5-based service"""
     try:
-        # Use the paraphrase function from the service
-        paraphrases, params = paraphrase(
-            text=text,
-            level=level,
-            num_return_sequences=max(1, num_options),
-            max_new_tokens=max_new_tokens,
-            model_name=model_name
-        )
+        paraphrases = request_paraphrases(text, level, model_name, max_new_tokens, num_options)
         
         # Check if we got valid paraphrases different from original
         if paraphrases and len(paraphrases) > 0:
@@ -323,6 +451,9 @@ def generate_improved_paraphrase(text, level, model_name="t5", max_new_tokens=10
             fallback = f"Alternative phrasing: {text}" 
             return [fallback]
             
+    except RuntimeError:
+        # Busy or still loading: the caller shows the message, there is nothing to fall back to
+        raise
     except Exception as e:
         st.error(f"Error generating paraphrase: {str(e)}")
         import traceback
@@ -377,12 +508,6 @@ def show_dashboard():
     st.markdown("### What would you like to do?")
     tab1, tab2, tab3, tab4 = st.tabs(["Summarize", "Paraphrase", "Readability", "History"])
 
-    summary_params = [
-        {"max_length": 45, "min_length": 10, "length_penalty": 1.0, "num_beams": 3, "name": "short_summary.txt"},
-        {"max_length": 70, "min_length": 40, "length_penalty": 1.5, "num_beams": 5, "name": "medium_summary.txt"},
-        {"max_length": 100, "min_length": 80, "length_penalty": 2.0, "num_beams": 6, "name": "long_summary.txt"},
-    ]
-
     paraphrase_options = {
         "Beginner": {
             "level": "conservative", 
@@ -406,6 +531,24 @@ def show_dashboard():
 
     # Summarize Tab
     with tab1:
+        status = summarizer_status()
+        if status is None:
+            st.info("Summarization service is unreachable; summaries will run locally and the first one may take a while.")
+        elif status["error"]:
+            st.warning(f"Summarization model failed to load: {status['error']}")
+        elif not status["ready"]:
+            st.info("⏳ Summarization model is warming up. The first summary may take a little longer.")
+
+        fast_summary = st.checkbox(
+            "⚡ Fast mode for long documents",
+            help="Keeps only the most central sentences before the model runs. Much faster on long texts, slightly less complete."
+        )
+        stream_summary = st.checkbox(
+            "✍️ Show the summary as it is written",
+            value=True,
+            help="Streams a single summary as the model writes it. Decodes greedily, so it can read slightly less polished; not used in fast mode."
+        )
+
         if st.button("Generate Summary"):
             st.session_state.show_summary_options = True
             # Reset feedback state for new generation
@@ -419,69 +562,52 @@ def show_dashboard():
             with col1:
                 if st.button("Short Summary"):
                     try:
-                        params = summary_params[0]
-                        summary = generate_summary(
-                            text,
-                            max_length=params["max_length"],
-                            min_length=params["min_length"],
-                            length_penalty=params["length_penalty"],
-                            num_beams=params["num_beams"]
-                        ) if len(text.split()) < 500 else summarize_long_text(text)
+                        # Unstreamed, all lengths come from one encode and the other buttons then hit the cache
+                        summary_result = summarize_for_button(text, "short", fast=fast_summary, stream=stream_summary)
+                        summary = summary_result["summaries"]["short"]
                         st.session_state.summary = summary
                         st.session_state.show_summary_options = False
                         
                         # Save to history and capture processing ID
                         if "user_id" in st.session_state:
-                            processing_id = save_to_history(st.session_state.user_id, text, summary, "summary", "short")
+                            processing_id = save_to_history(st.session_state.user_id, text, summary, "summary", f"short ({summary_result['tier']})")
                             st.session_state["last_processing_id"] = processing_id
                         
-                        st.success("Short summary generated!")
+                        st.success(f"Short summary generated with {summary_result['tier']}!")
                     except Exception as e:
                         st.error(f"Error generating short summary: {str(e)}")
 
             with col2:
                 if st.button("Medium Summary"):
                     try:
-                        params = summary_params[1]
-                        summary = generate_summary(
-                            text,
-                            max_length=params["max_length"],
-                            min_length=params["min_length"],
-                            length_penalty=params["length_penalty"],
-                            num_beams=params["num_beams"]
-                        ) if len(text.split()) < 500 else summarize_long_text(text)
+                        summary_result = summarize_for_button(text, "medium", fast=fast_summary, stream=stream_summary)
+                        summary = summary_result["summaries"]["medium"]
                         st.session_state.summary = summary
                         st.session_state.show_summary_options = False
                         
                         # Save to history and capture processing ID
                         if "user_id" in st.session_state:
-                            processing_id = save_to_history(st.session_state.user_id, text, summary, "summary", "medium")
+                            processing_id = save_to_history(st.session_state.user_id, text, summary, "summary", f"medium ({summary_result['tier']})")
                             st.session_state["last_processing_id"] = processing_id
                         
-                        st.success("Medium summary generated!")
+                        st.success(f"Medium summary generated with {summary_result['tier']}!")
                     except Exception as e:
                         st.error(f"Error generating medium summary: {str(e)}")
 
             with col3:
                 if st.button("Long Summary"):
                     try:
-                        params = summary_params[2]
-                        summary = generate_summary(
-                            text,
-                            max_length=params["max_length"],
-                            min_length=params["min_length"],
-                            length_penalty=params["length_penalty"],
-                            num_beams=params["num_beams"]
-                        ) if len(text.split()) < 500 else summarize_long_text(text)
+                        summary_result = summarize_for_button(text, "long", fast=fast_summary, stream=stream_summary)
+                        summary = summary_result["summaries"]["long"]
                         st.session_state.summary = summary
                         st.session_state.show_summary_options = False
                         
                         # Save to history and capture processing ID
                         if "user_id" in st.session_state:
-                            processing_id = save_to_history(st.session_state.user_id, text, summary, "summary", "long")
+                            processing_id = save_to_history(st.session_state.user_id, text, summary, "summary", f"long ({summary_result['tier']})")
                             st.session_state["last_processing_id"] = processing_id
                         
-                        st.success("Long summary generated!")
+                        st.success(f"Long summary generated with {summary_result['tier']}!")
                     except Exception as e:
                         st.error(f"Error generating long summary: {str(e)}")
 
@@ -684,12 +810,13 @@ def show_dashboard():
                     params = paraphrase_options["Beginner"]
                     try:
                         with st.spinner("Generating conservative paraphrase..."):
+                            # One level per click, streamed; "Generate Another" adds alternatives
                             paraphrases = generate_improved_paraphrase(
                                 text,
                                 level=params["level"],
                                 model_name=params["model_name"],
                                 max_new_tokens=params["max_new_tokens"],
-                                num_options=2
+                                num_options=1
                             )
                         st.session_state.paraphrased = paraphrases[0]  # Use the best one
                         st.session_state.all_paraphrases = paraphrases
@@ -710,12 +837,13 @@ def show_dashboard():
                     params = paraphrase_options["Intermediate"]
                     try:
                         with st.spinner("Generating balanced paraphrase..."):
+                            # One level per click, streamed; "Generate Another" adds alternatives
                             paraphrases = generate_improved_paraphrase(
                                 text,
                                 level=params["level"],
                                 model_name=params["model_name"],
                                 max_new_tokens=params["max_new_tokens"],
-                                num_options=2
+                                num_options=1
                             )
                         st.session_state.paraphrased = paraphrases[0]  # Use the best one
                         st.session_state.all_paraphrases = paraphrases
@@ -736,12 +864,13 @@ def show_dashboard():
                     params = paraphrase_options["Advanced"]
                     try:
                         with st.spinner("Generating creative paraphrase..."):
+                            # One level per click, streamed; "Generate Another" adds alternatives
                             paraphrases = generate_improved_paraphrase(
                                 text,
                                 level=params["level"],
                                 model_name=params["model_name"],
                                 max_new_tokens=params["max_new_tokens"],
-                                num_options=2
+                                num_options=1
                             )
                         st.session_state.paraphrased = paraphrases[0]  # Use the best one
                         st.session_state.all_paraphrases = paraphrases
@@ -2144,7 +2273,7 @@ def regenerate_text(original_text, operation_type, model_info="balanced"):
     try:
         if operation_type == "summary":
             # Generate summary with appropriate parameters
-            return generate_summary(original_text, max_length=100, min_length=30, num_beams=4)
+            return request_summaries(original_text, lengths=["long"])["summaries"]["long"]
         elif operation_type == "paraphrase":
             # Use balanced level if model_info is not a valid level
             level = model_info if model_info in ["light", "balanced", "heavy"] else "balanced"